@@ -0,0 +1,268 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.db import DatabaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: без flock файловый кэш годится только для одного процесса.
+    fcntl = None
+
+SEQUENCE_KEY = 'two_tier:sequence'
+LOG_KEY = 'two_tier:log:{}'
+# Его incr и add - чтение и запись без блокировки: два процесса получат
+# один номер журнала, и запись одного из них пропадет.
+NON_ATOMIC_BACKENDS = (DatabaseCache,)
+# Файл блокировки в каталоге файлового кэша. У него нет суффикса
+# .djcache, поэтому clear и вытеснение его не удаляют.
+LOCK_FILE = 'two_tier.lock'
+
+_missing = object()
+_local_tiers = {}
+_local_tiers_lock = threading.Lock()
+
+
+class LocalTier:
+    """Ограниченный по размеру LRU-кэш в памяти процесса."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.sequence = None
+        self.synced_at = 0
+
+    def get(self, key, default=_missing):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires is not None and expires <= time.monotonic():
+                del self.entries[key]
+                return default
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        expires = None if timeout is None else time.monotonic() + timeout
+        with self.lock:
+            self.entries[key] = (expires, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def discard(self, keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class TwoTierCache(BaseCache):
+    """Кэш из двух уровней: LRU в памяти процесса перед общим кэшем.
+
+    LOCATION - псевдоним общего кэша из settings.CACHES. Каждое изменение
+    ключа публикуется в журнал в общем кэше; не реже чем раз в
+    SYNC_INTERVAL секунд процесс читает журнал и выбрасывает из своего
+    уровня ключи, измененные другими процессами. Номера журнала выдает
+    incr общего кэша, поэтому он должен быть атомарным: memcached, redis,
+    файловый кэш одной машины (incr и add идут под flock) или LocMemCache
+    для одного процесса. Кэш в базе отвергается с ImproperlyConfigured.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = location
+        self._local_timeout = options.get('LOCAL_TIMEOUT', 60)
+        self._sync_interval = options.get('SYNC_INTERVAL', 1)
+        self._log_size = options.get('LOG_SIZE', 1000)
+        self._log_timeout = options.get('LOG_TIMEOUT', 60 * 10)
+        with _local_tiers_lock:
+            self._local = _local_tiers.setdefault(
+                location, LocalTier(self._max_entries)
+            )
+
+    @property
+    def shared(self):
+        shared = caches[self._shared_alias]
+        if isinstance(shared, NON_ATOMIC_BACKENDS):
+            raise ImproperlyConfigured(
+                f'Общий кэш {self._shared_alias!r} для TwoTierCache должен '
+                f'поддерживать атомарный incr, '
+                f'{type(shared).__name__} не подходит'
+            )
+        return shared
+
+    @contextmanager
+    def _shared_lock(self):
+        """Блокировка incr и add файлового кэша между процессами."""
+        shared = self.shared
+        if not isinstance(shared, FileBasedCache) or fcntl is None:
+            yield shared
+            return
+        os.makedirs(shared._dir, exist_ok=True)
+        with open(os.path.join(shared._dir, LOCK_FILE), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield shared
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _local_key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _local_expiry(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return self._local_timeout
+        return min(timeout, self._local_timeout)
+
+    def _publish(self, keys):
+        keys = list(keys)
+        if not keys:
+            return
+        with self._shared_lock() as shared:
+            try:
+                sequence = shared.incr(SEQUENCE_KEY, len(keys))
+            except ValueError:
+                shared.add(SEQUENCE_KEY, 0, None)
+                sequence = shared.incr(SEQUENCE_KEY, len(keys))
+        first = sequence - len(keys) + 1
+        self.shared.set_many(
+            {
+                LOG_KEY.format(number): key
+                for number, key in enumerate(keys, first)
+            },
+            self._log_timeout
+        )
+
+    def _sync(self):
+        local = self._local
+        now = time.monotonic()
+        if now - local.synced_at < self._sync_interval:
+            return
+        local.synced_at = now
+        sequence = self.shared.get(SEQUENCE_KEY, 0)
+        seen = local.sequence
+        local.sequence = sequence
+        if seen is None or sequence == seen:
+            return
+        if sequence < seen or sequence - seen > self._log_size:
+            local.clear()
+            return
+        numbers = range(seen + 1, sequence + 1)
+        changed = self.shared.get_many(
+            [LOG_KEY.format(number) for number in numbers]
+        )
+        if len(changed) < len(numbers):
+            local.clear()
+            return
+        local.discard(changed.values())
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        local_key = self._local_key(key, version)
+        with self._shared_lock() as shared:
+            added = shared.add(key, value, timeout, version)
+        if added:
+            self._local.set(local_key, value, self._local_expiry(timeout))
+            self._publish([local_key])
+        return added
+
+    def get(self, key, default=None, version=None):
+        local_key = self._local_key(key, version)
+        self._sync()
+        value = self._local.get(local_key)
+        if value is not _missing:
+            return value
+        value = self.shared.get(key, _missing, version)
+        if value is _missing:
+            return default
+        self._local.set(local_key, value, self._local_timeout)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        local_key = self._local_key(key, version)
+        self.shared.set(key, value, timeout, version)
+        self._local.set(local_key, value, self._local_expiry(timeout))
+        self._publish([local_key])
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        local_key = self._local_key(key, version)
+        self.shared.delete(key, version)
+        self._local.discard([local_key])
+        self._publish([local_key])
+
+    def get_many(self, keys, version=None):
+        self._sync()
+        found = {}
+        missing = []
+        for key in keys:
+            value = self._local.get(self._local_key(key, version))
+            if value is _missing:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            fetched = self.shared.get_many(missing, version)
+            for key, value in fetched.items():
+                self._local.set(
+                    self._local_key(key, version), value, self._local_timeout
+                )
+            found.update(fetched)
+        return found
+
+    def has_key(self, key, version=None):
+        local_key = self._local_key(key, version)
+        self._sync()
+        if self._local.get(local_key) is not _missing:
+            return True
+        return self.shared.has_key(key, version)
+
+    def incr(self, key, delta=1, version=None):
+        local_key = self._local_key(key, version)
+        with self._shared_lock() as shared:
+            value = shared.incr(key, delta, version)
+        self._local.set(local_key, value, self._local_timeout)
+        self._publish([local_key])
+        return value
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version)
+        local_keys = []
+        for key, value in data.items():
+            local_key = self._local_key(key, version)
+            if key not in failed:
+                self._local.set(local_key, value, self._local_expiry(timeout))
+            local_keys.append(local_key)
+        self._publish(local_keys)
+        return failed
+
+    def delete_many(self, keys, version=None):
+        local_keys = [self._local_key(key, version) for key in keys]
+        self.shared.delete_many(keys, version)
+        self._local.discard(local_keys)
+        self._publish(local_keys)
+
+    def clear(self):
+        self.shared.clear()
+        self._local.clear()
+        self._local.sequence = None
@@ -0,0 +1,8 @@
+from django.conf import settings
+
+
+def cache_timeout(request):
+    """Добавляет время жизни фрагментов кэша лент."""
+    return {
+        'cache_timeout': settings.FEED_CACHE_TIMEOUT
+    }
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.single_flight import stats
+
+
+class Command(BaseCommand):
+    help = 'Выводит счетчики пересчетов фрагментов кэша'
+
+    def handle(self, *args, **options):
+        for event, count in stats().items():
+            self.stdout.write(f'{event}: {count}')
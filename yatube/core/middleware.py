@@ -0,0 +1,148 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers
+)
+from django.utils.http import quote_etag
+
+PAGE_KEY = 'page:{}'
+# Ключ последней сохраненной копии страницы и блокировка ее построения,
+# по пути с параметрами.
+LATEST_PAGE_KEY = 'page:latest:{}'
+PAGE_LOCK_KEY = 'page:lock:{}'
+# Cookie, при которых страница может отличаться от общей.
+PRIVATE_COOKIES = (settings.SESSION_COOKIE_NAME, 'messages')
+
+
+class AnonymousPageCacheMiddleware:
+    """Кэш целых страниц для анонимов без сессии.
+
+    Кэшируются только view с атрибутом etag_func (его ставит
+    posts.conditional.conditional). Ключ - путь с параметрами и ETag,
+    который собран из поколений кэша; сигналы постов сдвигают поколения,
+    поэтому устаревшая страница больше не находится и истекает сама.
+    Попадание не проходит ни сессии, ни авторизацию, ни CSRF, ни
+    шаблоны. Ставится в MIDDLEWARE сразу после SecurityMiddleware.
+
+    Промах строит страницу под блокировкой, как core.single_flight:
+    одновременные с ним запросы той же страницы получают ее предыдущую
+    копию или ждут новую до SINGLE_FLIGHT_WAIT секунд.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def _etag_func(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        if any(name in request.COOKIES for name in PRIVATE_COOKIES):
+            return None
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        etag_func = getattr(match.func, 'etag_func', None)
+        if etag_func is None:
+            return None
+        return lambda: etag_func(request, *match.args, **match.kwargs)
+
+    def _key(self, request, etag):
+        return PAGE_KEY.format(hashlib.md5(
+            f'{request.get_full_path()}|{etag}'.encode()
+        ).hexdigest())
+
+    def __call__(self, request):
+        etag_func = self._etag_func(request)
+        if etag_func is None:
+            return self.get_response(request)
+        # Без cookie сессии пользователь - аноним; AuthenticationMiddleware
+        # при промахе все равно заменит request.user.
+        request.user = AnonymousUser()
+        # ETag может быть неизвестен до view: тогда страница строится,
+        # а сохраняется под ETag ответа.
+        etag = etag_func()
+        key = None if etag is None else self._key(request, quote_etag(etag))
+        cached = None if key is None else cache.get(key)
+        if cached is not None:
+            return self._cached(request, cached, 'hit')
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        lock_key = PAGE_LOCK_KEY.format(path)
+        locked = cache.add(lock_key, 1, settings.SINGLE_FLIGHT_LOCK_TIMEOUT)
+        if not locked:
+            cached = self._wait(key, path)
+            if cached is not None:
+                return self._cached(request, cached, 'stale')
+        try:
+            response = self.get_response(request)
+            if self._cacheable(request, response):
+                self._store(request, response, path)
+        finally:
+            if locked:
+                cache.delete(lock_key)
+        return response
+
+    def _cached(self, request, cached, source):
+        status, headers, content = cached
+        response = HttpResponse(content, status=status)
+        for header, value in headers:
+            response[header] = value
+        response['X-Page-Cache'] = source
+        return get_conditional_response(
+            request, etag=response.get('ETag'), response=response
+        )
+
+    def _wait(self, key, path):
+        """Копия страницы, пока ее строит другой запрос.
+
+        Сразу отдается предыдущая копия; если ее нет, новая ожидается
+        до SINGLE_FLIGHT_WAIT секунд.
+        """
+        latest_key = LATEST_PAGE_KEY.format(path)
+        deadline = time.time() + settings.SINGLE_FLIGHT_WAIT
+        while True:
+            latest = cache.get(latest_key)
+            cached = None if latest is None else cache.get(latest)
+            if cached is None and key is not None:
+                cached = cache.get(key)
+            if cached is not None or time.time() >= deadline:
+                return cached
+            time.sleep(settings.SINGLE_FLIGHT_POLL_INTERVAL)
+
+    def _store(self, request, response, path):
+        patch_cache_control(
+            response,
+            public=True,
+            s_maxage=settings.PAGE_CACHE_EDGE_MAX_AGE,
+        )
+        patch_vary_headers(response, ('Cookie',))
+        key = self._key(request, response['ETag'])
+        # Ответ хранится по частям: локальный уровень кэша не копирует
+        # объекты, а ответ меняется дальше по цепочке middleware.
+        cache.set_many(
+            {
+                key: (
+                    response.status_code,
+                    list(response.items()),
+                    response.content,
+                ),
+                LATEST_PAGE_KEY.format(path): key,
+            },
+            settings.PAGE_CACHE_TIMEOUT
+        )
+        response['X-Page-Cache'] = 'miss'
+
+    def _cacheable(self, request, response):
+        user = getattr(request, 'user', None)
+        return (
+            response.status_code == 200
+            and response.has_header('ETag')
+            and not response.streaming
+            and not response.cookies
+            and (user is None or not user.is_authenticated)
+        )
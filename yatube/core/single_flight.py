@@ -0,0 +1,77 @@
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+LOCK_KEY = 'single_flight:lock:{}'
+STATS_KEY = 'single_flight:stats:{}'
+EVENTS = ('recomputed', 'coalesced', 'waited', 'timed_out')
+
+
+def _count(event):
+    key = STATS_KEY.format(event)
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            pass
+
+
+def stats():
+    """Счетчики пересчетов: выполненных и объединенных с чужими."""
+    counters = cache.get_many([STATS_KEY.format(event) for event in EVENTS])
+    return {
+        event: counters.get(STATS_KEY.format(event), 0) for event in EVENTS
+    }
+
+
+def _fresh(entry):
+    """Проверка свежести с вероятностным досрочным истечением (XFetch).
+
+    Чем дольше пересчет значения и ближе срок, тем вероятнее, что один
+    из запросов начнет пересчет заранее, пока остальные читают кэш.
+    """
+    value, expires, delta = entry
+    early = delta * settings.SINGLE_FLIGHT_BETA * math.log(
+        1 - random.random()
+    )
+    return time.time() - early < expires
+
+
+def get_or_compute(key, compute, timeout):
+    """Значение из кэша; при промахе пересчитывает только один воркер.
+
+    Остальные отдают устаревшее значение или недолго ждут нового.
+    """
+    entry = cache.get(key)
+    if entry is not None and _fresh(entry):
+        return entry[0]
+    lock_key = LOCK_KEY.format(key)
+    if cache.add(lock_key, 1, settings.SINGLE_FLIGHT_LOCK_TIMEOUT):
+        try:
+            started = time.time()
+            value = compute()
+            finished = time.time()
+            cache.set(
+                key,
+                (value, finished + timeout, finished - started),
+                timeout + settings.SINGLE_FLIGHT_STALE_TIMEOUT
+            )
+        finally:
+            cache.delete(lock_key)
+        _count('recomputed')
+        return value
+    if entry is not None:
+        _count('coalesced')
+        return entry[0]
+    deadline = time.time() + settings.SINGLE_FLIGHT_WAIT
+    while time.time() < deadline:
+        time.sleep(settings.SINGLE_FLIGHT_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            _count('waited')
+            return entry[0]
+    _count('timed_out')
+    return compute()
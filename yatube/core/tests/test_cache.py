@@ -0,0 +1,115 @@
+import multiprocessing
+import shutil
+import tempfile
+
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+
+from ..cache import LocalTier, TwoTierCache
+
+KEY = 'test-key'
+FILE_CACHE_DIR = tempfile.mkdtemp()
+PROCESSES = 4
+INCREMENTS = 50
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'two-tier-tests',
+    },
+}
+
+
+def increment(alias, times):
+    worker = TwoTierCache(alias, {})
+    for _ in range(times):
+        worker.incr(KEY)
+
+
+def make_worker():
+    """Кэш отдельного воркера: свой локальный уровень, общий L2."""
+    worker = TwoTierCache('shared', {
+        'OPTIONS': {'MAX_ENTRIES': 2, 'SYNC_INTERVAL': 0},
+    })
+    worker._local = LocalTier(2)
+    return worker
+
+
+@override_settings(CACHES=CACHES)
+class TwoTierCacheTests(SimpleTestCase):
+    def setUp(self):
+        caches['shared'].clear()
+        self.first = make_worker()
+        self.second = make_worker()
+
+    def test_values_are_shared_between_workers(self):
+        """Значение, записанное одним воркером, видно другому"""
+        self.first.set(KEY, 1)
+        self.assertEqual(self.second.get(KEY), 1)
+
+    def test_local_tier_serves_hits(self):
+        """Повторное чтение обслуживается локальным уровнем"""
+        self.first.set(KEY, 1)
+        caches['shared'].set(KEY, 2)
+        self.assertEqual(self.first.get(KEY), 1)
+
+    def test_changes_are_published_to_other_workers(self):
+        """Изменение ключа выбрасывает его из локальных уровней"""
+        self.first.set(KEY, 1)
+        self.assertEqual(self.second.get(KEY), 1)
+        self.first.set(KEY, 2)
+        self.assertEqual(self.second.get(KEY), 2)
+        self.first.incr(KEY)
+        self.assertEqual(self.second.get(KEY), 3)
+        self.first.delete(KEY)
+        self.assertIsNone(self.second.get(KEY))
+
+    def test_local_tier_is_bounded(self):
+        """Локальный уровень хранит не больше MAX_ENTRIES ключей"""
+        self.first.set_many({'a': 1, 'b': 2, 'c': 3})
+        self.assertEqual(len(self.first._local.entries), 2)
+        self.assertEqual(self.first.get_many(['a', 'b', 'c']), {
+            'a': 1, 'b': 2, 'c': 3
+        })
+
+
+@override_settings(CACHES={
+    **CACHES,
+    'files': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': FILE_CACHE_DIR,
+    },
+    'database': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'two_tier_tests',
+    },
+})
+class SharedBackendTests(SimpleTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(FILE_CACHE_DIR, ignore_errors=True)
+
+    def test_non_atomic_backend_is_refused(self):
+        """Общий кэш без атомарного incr отвергается"""
+        worker = TwoTierCache('database', {})
+        with self.assertRaises(ImproperlyConfigured):
+            worker.set(KEY, 1)
+
+    def test_file_backend_counts_across_processes(self):
+        """incr файлового кэша из разных процессов не теряет приращений"""
+        caches['files'].clear()
+        caches['files'].set(KEY, 0, None)
+        context = multiprocessing.get_context('fork')
+        processes = [
+            context.Process(target=increment, args=('files', INCREMENTS))
+            for _ in range(PROCESSES)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.assertEqual(caches['files'].get(KEY), PROCESSES * INCREMENTS)
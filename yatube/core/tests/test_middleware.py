@@ -0,0 +1,145 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+from ..middleware import PAGE_LOCK_KEY
+
+GROUP_SLUG = 'test-slug'
+POST_AUTHOR_USERNAME = 'TestPostAuthor'
+POST_TEXT = 'Тестовый текст'
+NEW_POST_TEXT = 'Новый пост'
+INDEX_URL = reverse('posts:index')
+GROUP_LIST_URL = reverse('posts:group_list', kwargs={'slug': GROUP_SLUG})
+PROFILE_URL = reverse(
+    'posts:profile', kwargs={'username': POST_AUTHOR_USERNAME}
+)
+CREATE_URL = reverse('posts:post_create')
+
+
+def path_hash(url):
+    return hashlib.md5(url.encode()).hexdigest()
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=POST_AUTHOR_USERNAME)
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug=GROUP_SLUG,
+            description='Тестовое описание'
+        )
+        cls.post = Post.objects.create(
+            text=POST_TEXT, author=cls.author, group=cls.group
+        )
+        cls.post_detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': cls.post.pk}
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+
+    def test_second_request_is_served_from_cache(self):
+        """Повторная страница анониму отдается из кэша"""
+        for url in (
+            INDEX_URL, GROUP_LIST_URL, PROFILE_URL, self.post_detail_url
+        ):
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                second = self.guest_client.get(url)
+                self.assertEqual(first['X-Page-Cache'], 'miss')
+                self.assertEqual(second['X-Page-Cache'], 'hit')
+                self.assertEqual(first.content, second.content)
+
+    def test_hit_skips_database(self):
+        """Попадание в кэш ленты не обращается к базе"""
+        self.guest_client.get(INDEX_URL)
+        with self.assertNumQueries(0):
+            self.guest_client.get(INDEX_URL)
+
+    def test_query_string_is_part_of_key(self):
+        """Разные параметры запроса - разные записи"""
+        self.guest_client.get(INDEX_URL)
+        response = self.guest_client.get(INDEX_URL, {'page': 2})
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+
+    def test_new_post_invalidates_pages(self):
+        """Новый пост вытесняет закэшированные страницы"""
+        for url in (INDEX_URL, GROUP_LIST_URL, PROFILE_URL):
+            self.guest_client.get(url)
+        Post.objects.create(
+            text=NEW_POST_TEXT, author=self.author, group=self.group
+        )
+        for url in (INDEX_URL, GROUP_LIST_URL, PROFILE_URL):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response['X-Page-Cache'], 'miss')
+                self.assertContains(response, NEW_POST_TEXT)
+
+    def test_users_and_sessions_bypass_cache(self):
+        """Пользователи и запросы с сессией идут мимо кэша"""
+        self.guest_client.get(INDEX_URL)
+        response = self.authorized_client.get(INDEX_URL)
+        self.assertNotIn('X-Page-Cache', response)
+        self.assertEqual(response.context['user'], self.author)
+        self.guest_client.cookies[settings.SESSION_COOKIE_NAME] = 'stale'
+        response = self.guest_client.get(INDEX_URL)
+        self.assertNotIn('X-Page-Cache', response)
+
+    def test_other_views_are_not_cached(self):
+        """Страницы без ETag и формы не кэшируются"""
+        response = self.guest_client.get(CREATE_URL)
+        self.assertNotIn('X-Page-Cache', response)
+
+    def test_hit_answers_conditional_request(self):
+        """Попадание отвечает 304 на совпавший If-None-Match"""
+        etag = self.guest_client.get(INDEX_URL)['ETag']
+        response = self.guest_client.get(INDEX_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_headers_allow_shared_caches(self):
+        """Ответ можно хранить в общем кэше, отдельно по Cookie"""
+        for response in (
+            self.guest_client.get(INDEX_URL),
+            self.guest_client.get(INDEX_URL),
+        ):
+            with self.subTest(source=response['X-Page-Cache']):
+                self.assertIn('public', response['Cache-Control'])
+                self.assertIn('s-maxage=', response['Cache-Control'])
+                self.assertIn('Cookie', response['Vary'])
+
+    def test_follow_index_redirects_guest(self):
+        """Лента подписок для анонима не кэшируется"""
+        response = self.guest_client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.status_code, 302)
+        self.assertNotIn('X-Page-Cache', response)
+
+    def test_concurrent_miss_serves_previous_copy(self):
+        """Пока страницу строит другой запрос, отдается прежняя копия"""
+        self.guest_client.get(INDEX_URL)
+        Post.objects.create(text=NEW_POST_TEXT, author=self.author)
+        cache.add(PAGE_LOCK_KEY.format(path_hash(INDEX_URL)), 1)
+        response = self.guest_client.get(INDEX_URL)
+        self.assertEqual(response['X-Page-Cache'], 'stale')
+        self.assertNotContains(response, NEW_POST_TEXT)
+        cache.delete(PAGE_LOCK_KEY.format(path_hash(INDEX_URL)))
+        response = self.guest_client.get(INDEX_URL)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, NEW_POST_TEXT)
+
+    @override_settings(SINGLE_FLIGHT_WAIT=0)
+    def test_concurrent_miss_without_copy_renders_page(self):
+        """Без прежней копии запрос не ждет дольше SINGLE_FLIGHT_WAIT"""
+        cache.add(PAGE_LOCK_KEY.format(path_hash(INDEX_URL)), 1)
+        response = self.guest_client.get(INDEX_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, POST_TEXT)
@@ -0,0 +1,80 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import SimpleTestCase, override_settings
+
+from ..single_flight import LOCK_KEY, get_or_compute, stats
+
+KEY = 'test-fragment'
+TIMEOUT = 60
+VALUE = 'Новое значение'
+STALE_VALUE = 'Устаревшее значение'
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'single-flight-tests',
+    },
+}
+
+
+@override_settings(
+    CACHES=CACHES, SINGLE_FLIGHT_WAIT=0.1, SINGLE_FLIGHT_POLL_INTERVAL=0.01
+)
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.compute = mock.Mock(return_value=VALUE)
+
+    def test_value_is_computed_once(self):
+        """Значение пересчитывается один раз и затем берется из кэша"""
+        for _ in range(3):
+            self.assertEqual(
+                get_or_compute(KEY, self.compute, TIMEOUT), VALUE
+            )
+        self.compute.assert_called_once()
+        self.assertEqual(stats()['recomputed'], 1)
+
+    def test_stale_value_served_while_locked(self):
+        """Пока другой воркер пересчитывает, отдается устаревшее значение"""
+        cache.set(KEY, (STALE_VALUE, time.time() - 1, 0))
+        cache.add(LOCK_KEY.format(KEY), 1)
+        self.assertEqual(
+            get_or_compute(KEY, self.compute, TIMEOUT), STALE_VALUE
+        )
+        self.compute.assert_not_called()
+        self.assertEqual(stats()['coalesced'], 1)
+
+    def test_expired_value_recomputed_without_lock(self):
+        """Устаревшее значение пересчитывается, если блокировка свободна"""
+        cache.set(KEY, (STALE_VALUE, time.time() - 1, 0))
+        self.assertEqual(get_or_compute(KEY, self.compute, TIMEOUT), VALUE)
+        self.assertIsNone(cache.get(LOCK_KEY.format(KEY)))
+
+    def test_wait_times_out(self):
+        """Без значения и при занятой блокировке воркер ждет и считает сам"""
+        cache.add(LOCK_KEY.format(KEY), 1)
+        self.assertEqual(get_or_compute(KEY, self.compute, TIMEOUT), VALUE)
+        self.assertEqual(stats()['timed_out'], 1)
+
+    def test_early_expiration(self):
+        """Долгий пересчет обновляется заранее, до истечения срока"""
+        cache.set(KEY, (STALE_VALUE, time.time() + 1, 10))
+        with mock.patch('random.random', return_value=0.99):
+            self.assertEqual(
+                get_or_compute(KEY, self.compute, TIMEOUT), VALUE
+            )
+
+    def test_template_tag(self):
+        """Тег кэширует фрагмент с учетом переменных"""
+        template = Template(
+            '{% load single_flight %}'
+            '{% single_flight_cache 60 fragment name %}'
+            '{{ name }}{% endsingle_flight_cache %}'
+        )
+        self.assertEqual(template.render(Context({'name': 'a'})), 'a')
+        self.assertEqual(template.render(Context({'name': 'b'})), 'b')
+        self.assertEqual(stats()['recomputed'], 2)
+        template.render(Context({'name': 'a'}))
+        self.assertEqual(stats()['recomputed'], 2)
@@ -1,13 +1,31 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
 from django.conf import settings
+from django.db.models.functions import Substr
 
 from .models import Group, Post, Comment, Follow
+from .paginators import EstimatedCountPaginator
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Список без COUNT(*) по всей таблице для больших таблиц.
+
+    Сортировка по первичному ключу читается из его индекса. Даты
+    фильтруются диапазонами list_filter: date_hierarchy строил бы
+    список дат через DISTINCT по всей таблице.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ('-pk',)
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(LargeTableAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group',)
     list_editable = ('group',)
+    list_select_related = ('author', 'group',)
+    autocomplete_fields = ('author', 'group',)
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = settings.EMPTY_FIELD
@@ -19,13 +37,44 @@ class GroupAdmin(admin.ModelAdmin):
     search_fields = ('title',)
 
 
+class CommentChangeList(ChangeList):
+    def get_results(self, request):
+        """Начала постов страницы читаются отдельным запросом по id.
+
+        Так в запросах списка и подсчета нет JOIN с постами.
+        """
+        super().get_results(request)
+        self.result_list = list(self.result_list)
+        previews = dict(
+            Post.objects.filter(
+                pk__in={comment.post_id for comment in self.result_list}
+            ).annotate(
+                preview=Substr('text', 1, 15)
+            ).values_list('pk', 'preview')
+        )
+        for comment in self.result_list:
+            comment.post_preview = previews.get(comment.post_id)
+
+
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
-    list_display = ('post', 'author', 'text', 'created',)
+class CommentAdmin(LargeTableAdmin):
+    list_display = ('post_preview', 'author', 'text', 'created',)
+    list_select_related = ('author',)
+    raw_id_fields = ('post',)
+    autocomplete_fields = ('author',)
     search_fields = ('text',)
     list_filter = ('created',)
 
+    def get_changelist(self, request, **kwargs):
+        return CommentChangeList
+
+    def post_preview(self, comment):
+        return comment.post_preview
+    post_preview.short_description = 'Пост'
+
 
 @admin.register(Follow)
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(LargeTableAdmin):
     list_display = ('user', 'author',)
+    list_select_related = ('user', 'author',)
+    autocomplete_fields = ('user', 'author',)
@@ -0,0 +1,175 @@
+from functools import wraps
+
+from django.conf import settings
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_GET
+
+from . import thumbnails
+from .feed import follow_feed
+from .models import Comment, Group, Post, User
+from .paginators import CursorPaginator
+
+# Поле ответа: функция значения и колонки, которые для него читаются.
+POST_FIELDS = {
+    'id': (lambda post: post.pk, ()),
+    'text': (lambda post: post.text, ('text',)),
+    'pub_date': (lambda post: post.pub_date, ('pub_date',)),
+    'author': (
+        lambda post: post.author.username, ('author', 'author__username')
+    ),
+    'group': (
+        lambda post: post.group.slug if post.group_id else None,
+        ('group', 'group__slug'),
+    ),
+    'image': (lambda post: post.picture, ('image', 'image_variants')),
+}
+COMMENT_FIELDS = {
+    'id': (lambda comment: comment.pk, ()),
+    'post': (lambda comment: comment.post_id, ('post',)),
+    'author': (
+        lambda comment: comment.author.username,
+        ('author', 'author__username'),
+    ),
+    'text': (lambda comment: comment.text, ('text',)),
+    'created': (lambda comment: comment.created, ('created',)),
+}
+
+
+class ApiError(Exception):
+    def __init__(self, detail, status=400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+
+
+def _json(data, status=200):
+    return JsonResponse(
+        data,
+        status=status,
+        json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')},
+    )
+
+
+def api_view(view):
+    """Отдает результат view в компактном JSON, ошибки - как {detail}."""
+    @require_GET
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return _json(view(request, *args, **kwargs))
+        except Http404:
+            return _json({'detail': 'Не найдено'}, status=404)
+        except ApiError as error:
+            return _json({'detail': error.detail}, status=error.status)
+    return wrapper
+
+
+def requested_fields(request, available):
+    """Поля из ?fields=a,b; без параметра - все поля."""
+    names = [
+        name for name in request.GET.get('fields', '').split(',') if name
+    ]
+    unknown = sorted(set(names) - set(available))
+    if unknown:
+        raise ApiError(f'Неизвестные поля: {", ".join(unknown)}')
+    return names or list(available)
+
+
+def page_size(request):
+    try:
+        size = int(request.GET.get('limit', settings.COUNT_PAGE_POSTS))
+    except ValueError:
+        raise ApiError('limit должен быть числом')
+    return min(max(size, 1), settings.API_MAX_PAGE_SIZE)
+
+
+def narrow(queryset, fields, available, keys):
+    """Читает только колонки запрошенных полей и ключа сортировки."""
+    columns = {'pk', *keys}
+    for name in fields:
+        columns.update(available[name][1])
+    relations = {
+        column.split('__')[0] for column in columns if '__' in column
+    }
+    if relations:
+        # Без аргументов select_related прошел бы по всем внешним ключам.
+        queryset = queryset.select_related(*relations)
+    return queryset.only(*columns)
+
+
+def serialize(obj, fields, available):
+    return {name: available[name][0](obj) for name in fields}
+
+
+def _post_page(request, posts):
+    fields = requested_fields(request, POST_FIELDS)
+    page = CursorPaginator(
+        narrow(posts, fields, POST_FIELDS, ('pub_date',)), page_size(request)
+    ).get_page(
+        after=request.GET.get('after'), before=request.GET.get('before')
+    )
+    if 'image' in fields:
+        thumbnails.resolve(page)
+    return {
+        'results': [serialize(post, fields, POST_FIELDS) for post in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    }
+
+
+@api_view
+def index(request):
+    return _post_page(request, Post.objects.all())
+
+
+@api_view
+def group_posts(request, slug):
+    group = get_object_or_404(Group.objects.only('pk'), slug=slug)
+    return _post_page(request, group.posts.all())
+
+
+@api_view
+def profile(request, username):
+    author = get_object_or_404(User.objects.only('pk'), username=username)
+    return _post_page(request, author.posts.all())
+
+
+@api_view
+def follow_index(request):
+    if not request.user.is_authenticated:
+        raise ApiError('Нужна авторизация', status=401)
+    return _post_page(request, follow_feed(request.user))
+
+
+@api_view
+def post_detail(request, post_id):
+    fields = requested_fields(request, POST_FIELDS)
+    post = get_object_or_404(
+        narrow(Post.objects.all(), fields, POST_FIELDS, ()), pk=post_id
+    )
+    if 'image' in fields:
+        thumbnails.resolve([post])
+    return serialize(post, fields, POST_FIELDS)
+
+
+@api_view
+def post_comments(request, post_id):
+    get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    fields = requested_fields(request, COMMENT_FIELDS)
+    comments = narrow(
+        Comment.objects.filter(post_id=post_id),
+        fields,
+        COMMENT_FIELDS,
+        ('created',),
+    )
+    page = CursorPaginator(comments, page_size(request)).get_page(
+        after=request.GET.get('after'), before=request.GET.get('before')
+    )
+    return {
+        'results': [
+            serialize(comment, fields, COMMENT_FIELDS) for comment in page
+        ],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    }
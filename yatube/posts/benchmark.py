@@ -0,0 +1,285 @@
+import platform
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import timedelta
+from io import BytesIO
+from itertools import islice
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.db.models import Count, Max
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+from faker import Faker
+from PIL import Image
+
+from . import transfer
+from .models import AuthorStats, Comment, Follow, Group, Post, User
+
+# Показатель степенного распределения: чем меньше, тем сильнее перекос
+# в пользу первых авторов, постов и групп.
+SKEW = 1.2
+USERNAME = 'seed_user_{}'
+PERCENTILES = (50, 90, 99)
+
+
+def skewed(rng, count):
+    """Номер от 0 до count - 1; малые номера выпадают чаще всех."""
+    return min(int(rng.paretovariate(SKEW)) - 1, count - 1)
+
+
+def _next_pk(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def _create_users(fake, count, batch_size):
+    start = _next_pk(User)
+    users = (
+        User(
+            username=USERNAME.format(start + number),
+            first_name=fake.first_name(),
+            last_name=fake.last_name(),
+            password=make_password(None),
+        )
+        for number in range(count)
+    )
+    while True:
+        chunk = list(islice(users, batch_size))
+        if not chunk:
+            break
+        User.objects.bulk_create(chunk)
+    return [USERNAME.format(start + number) for number in range(count)]
+
+
+def _create_images(rng, count):
+    storage = Post.image.field.storage
+    names = []
+    for _ in range(count):
+        file = BytesIO()
+        color = tuple(rng.randrange(256) for _ in range(3))
+        Image.new('RGB', (1200, 800), color).save(file, 'jpeg')
+        names.append(
+            storage.save('posts/seed.jpg', ContentFile(file.getvalue()))
+        )
+    return names
+
+
+def seed(users, posts, comments, groups=10, follows=20, images=10,
+         image_ratio=0.3, days=365, batch_size=1000, random_seed=0):
+    """Создает синтетические данные с перекосом как у живой соцсети.
+
+    Число подписчиков, постов у автора и комментариев у поста
+    распределено по степенному закону: немногие авторы и посты
+    собирают большую часть активности. follows - среднее число подписок
+    пользователя. Данные загружаются через transfer.load, после чего
+    пересобираются счетчики, ленты и поисковый индекс.
+    """
+    rng = random.Random(random_seed)
+    fake = Faker('ru_RU')
+    fake.seed_instance(random_seed)
+    usernames = _create_users(fake, users, batch_size)
+    first_group = _next_pk(Group)
+    slugs = [f'seed-{first_group + number}' for number in range(groups)]
+    pictures = _create_images(rng, images) if posts and images else []
+    first_post = _next_pk(Post)
+    first_comment = _next_pk(Comment)
+    now = timezone.now()
+
+    def moment(number, total):
+        return now - timedelta(days=days) * (1 - (number + 1) / total)
+
+    def records():
+        for slug in slugs:
+            yield 'groups', {
+                'slug': slug,
+                'title': fake.sentence(nb_words=3),
+                'description': fake.paragraph(),
+            }
+        for number in range(posts):
+            yield 'posts', {
+                'id': first_post + number,
+                'author': usernames[skewed(rng, users)],
+                'group': (
+                    slugs[skewed(rng, groups)]
+                    if slugs and rng.random() < 0.7 else None
+                ),
+                'text': fake.paragraph(nb_sentences=rng.randint(1, 8)),
+                'pub_date': moment(number, posts).isoformat(),
+                'image': (
+                    rng.choice(pictures)
+                    if pictures and rng.random() < image_ratio else ''
+                ),
+            }
+        for number in range(comments if posts else 0):
+            # Чаще всего обсуждают свежие посты.
+            post = first_post + posts - 1 - skewed(rng, posts)
+            yield 'comments', {
+                'id': first_comment + number,
+                'post': post,
+                'author': usernames[rng.randrange(users)],
+                'text': fake.sentence(),
+                'created': moment(number, comments).isoformat(),
+            }
+        for username in usernames:
+            count = min(int(rng.expovariate(1 / follows)), users - 1)
+            authors = {usernames[skewed(rng, users)] for _ in range(count)}
+            for author in authors - {username}:
+                yield 'follows', {'user': username, 'author': author}
+
+    loaded = transfer.load(records(), batch_size)
+    transfer.refresh()
+    loaded['users'] = users
+    return loaded
+
+
+def scenarios():
+    """Адреса лент для замера и пользователь, от имени которого он идет.
+
+    Берутся самые нагруженные страницы: группа и автор с наибольшим
+    числом постов, пост с наибольшим числом комментариев и лента
+    пользователя с наибольшим числом подписок.
+    """
+    group = Group.objects.annotate(
+        total=Count('posts')
+    ).order_by('-total').first()
+    author = AuthorStats.objects.select_related('user').order_by(
+        '-posts_count'
+    ).first()
+    post = Comment.objects.values('post').annotate(
+        total=Count('pk')
+    ).order_by('-total').values_list('post', flat=True).first()
+    follower = AuthorStats.objects.select_related('user').filter(
+        following_count__gt=0
+    ).order_by('-following_count').first()
+    urls = {'index': (reverse('posts:index'), None)}
+    if group is not None:
+        urls['group_posts'] = (
+            reverse('posts:group_list', kwargs={'slug': group.slug}), None
+        )
+    if author is not None:
+        urls['profile'] = (
+            reverse(
+                'posts:profile', kwargs={'username': author.user.username}
+            ),
+            None
+        )
+    if post is None:
+        post = Post.objects.values_list('pk', flat=True).first()
+    if post is not None:
+        urls['post_detail'] = (
+            reverse('posts:post_detail', kwargs={'post_id': post}), None
+        )
+    if follower is not None:
+        urls['follow_index'] = (reverse('posts:follow_index'), follower.user)
+    # Те же данные через JSON API: сравнение показывает цену сериализации.
+    api_urls = {}
+    for name, (url, user) in urls.items():
+        match = resolve(url)
+        api_urls[f'api_{name}'] = (
+            reverse(f'api:{match.url_name}', kwargs=match.kwargs), user
+        )
+    if post is not None:
+        api_urls['api_post_comments'] = (
+            reverse('api:post_comments', kwargs={'post_id': post}), None
+        )
+    return {**urls, **api_urls}
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    index = round(percent / 100 * (len(values) - 1))
+    return values[index]
+
+
+def measure(url, user=None, repeat=20, warm=True):
+    """Задержки, запросы к базе, размер ответа и пиковая память страницы.
+
+    При warm=False кэш очищается перед каждым запросом, и замер
+    показывает стоимость страницы без готовых фрагментов.
+    """
+    client = Client()
+    if user is not None:
+        client.force_login(user)
+    if warm:
+        client.get(url)
+    timings = []
+    queries = []
+    for _ in range(repeat):
+        if not warm:
+            cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f'{url}: ответ {response.status_code}')
+        queries.append(len(captured))
+    if not warm:
+        cache.clear()
+    tracemalloc.start()
+    try:
+        client.get(url)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    result = {
+        f'p{percent}_ms': round(_percentile(timings, percent), 3)
+        for percent in PERCENTILES
+    }
+    result.update({
+        'mean_ms': round(statistics.mean(timings), 3),
+        'max_ms': round(max(timings), 3),
+        'queries': max(queries),
+        'bytes': len(response.content),
+        'peak_memory_kb': round(peak / 1024, 1),
+    })
+    return result
+
+
+def run(repeat=20, modes=('cold', 'warm')):
+    """Замеры всех лент; результат сериализуется в JSON."""
+    results = {}
+    for name, (url, user) in scenarios().items():
+        results[name] = {'url': url}
+        for mode in modes:
+            results[name][mode] = measure(
+                url, user, repeat=repeat, warm=mode == 'warm'
+            )
+    return {
+        'created': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'dataset': {
+            'users': User.objects.count(),
+            'posts': Post.objects.count(),
+            'comments': Comment.objects.count(),
+            'follows': Follow.objects.count(),
+        },
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def compare(baseline, current):
+    """Строки (страница, режим, метрика, было, стало, изменение в %)."""
+    rows = []
+    for name, modes in current['results'].items():
+        before = baseline.get('results', {}).get(name, {})
+        for mode, metrics in modes.items():
+            if mode == 'url' or mode not in before:
+                continue
+            for metric, value in metrics.items():
+                old = before[mode].get(metric)
+                if old is None:
+                    continue
+                change = (value - old) / old * 100 if old else 0.0
+                rows.append((name, mode, metric, old, value, change))
+    return rows
@@ -0,0 +1,66 @@
+import hashlib
+import uuid
+
+from django.core.cache import cache
+
+GENERATION_KEY = 'generation:{}'
+# Общее поколение всех фрагментов; сдвигается после миграций.
+ROOT_SCOPE = 'database'
+
+
+def _new_generation():
+    return uuid.uuid4().hex
+
+
+def bump(*scopes):
+    """Сдвигает поколения областей: их фрагменты в кэше устаревают."""
+    cache.set_many(
+        {GENERATION_KEY.format(scope): _new_generation() for scope in scopes},
+        None
+    )
+
+
+def versions(scope_lists):
+    """Версии нескольких наборов областей одним get_many."""
+    scope_lists = [(ROOT_SCOPE, *scopes) for scopes in scope_lists]
+    keys = {
+        scope: GENERATION_KEY.format(scope)
+        for scopes in scope_lists for scope in scopes
+    }
+    generations = cache.get_many(list(keys.values()))
+    missing = [key for key in keys.values() if key not in generations]
+    if missing:
+        for key in missing:
+            cache.add(key, _new_generation(), None)
+        generations.update(cache.get_many(missing))
+    return [
+        hashlib.md5('|'.join(
+            generations.get(keys[scope], '') for scope in scopes
+        ).encode()).hexdigest()
+        for scopes in scope_lists
+    ]
+
+
+def version(*scopes):
+    """Отпечаток текущих поколений областей для ключа фрагмента кэша."""
+    return versions([scopes])[0]
+
+
+def user_scopes(user_ids):
+    """Области пользователей, чьи имена выводит фрагмент."""
+    return [f'user:{pk}' for pk in sorted(set(user_ids))]
+
+
+def list_version(*scopes):
+    """Версия списка постов: кроме своих областей он выводит ссылки на
+    группы. Имена авторов передаются через user_scopes."""
+    return version(*scopes, 'groups')
+
+
+def follow_version(user):
+    """Версия ленты подписок: подписки пользователя и посты его авторов."""
+    authors = user.follower.values_list('author_id', flat=True)
+    return list_version(
+        f'follow:{user.pk}',
+        *(f'author:{author_id}' for author_id in authors)
+    )
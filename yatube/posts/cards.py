@@ -0,0 +1,67 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from core.single_flight import get_or_compute
+
+from . import caching, thumbnails
+
+CARD_KEY = 'card:{}:{}'
+# Карточки, которых не оказалось в кэше, рисует один запрос.
+MISSING_CARDS_KEY = 'cards:{}'
+CARD_TEMPLATE = 'posts/includes/post_card.html'
+
+
+def card_scopes(post):
+    """Карточка выводит сам пост, имя автора и ссылку на группу."""
+    return (f'post:{post.pk}', f'user:{post.author_id}', 'groups')
+
+
+def render_cards(posts):
+    """Карточки постов страницы в их порядке.
+
+    Ключ карточки - id поста и версия его областей, поэтому правка поста
+    сбрасывает только его карточку. Готовые карточки читаются одним
+    get_many, рисуются только недостающие: их рисует один запрос, а
+    одновременные с ним ждут его результата.
+    """
+    posts = list(posts)
+    keys = [
+        CARD_KEY.format(post.pk, card_version)
+        for post, card_version in zip(
+            posts, caching.versions([card_scopes(post) for post in posts])
+        )
+    ]
+    cards = cache.get_many(keys)
+    missing = [
+        (key, post) for key, post in zip(keys, posts) if key not in cards
+    ]
+    if missing:
+        batch = hashlib.md5(
+            '|'.join(key for key, post in missing).encode()
+        ).hexdigest()
+        cards.update(get_or_compute(
+            MISSING_CARDS_KEY.format(batch),
+            lambda: _render(missing),
+            settings.CARD_PLACEHOLDER_TIMEOUT,
+        ))
+    return [mark_safe(cards[key]) for key in keys]
+
+
+def _render(missing):
+    """Рисует и сохраняет недостающие карточки.
+
+    Карточка с заглушкой вместо картинки хранится недолго: варианты
+    картинки создает другой процесс.
+    """
+    thumbnails.resolve([post for key, post in missing])
+    ready, pending = {}, {}
+    for key, post in missing:
+        target = pending if post.picture is None and post.image else ready
+        target[key] = render_to_string(CARD_TEMPLATE, {'post': post})
+    cache.set_many(ready, settings.CARD_CACHE_TIMEOUT)
+    cache.set_many(pending, settings.CARD_PLACEHOLDER_TIMEOUT)
+    return {**ready, **pending}
@@ -0,0 +1,186 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+from django.views.decorators.http import condition
+
+from .caching import follow_version, list_version, user_scopes, version
+from .models import Group, Post, User
+
+# Пользователи, чьи имена вывела страница с данной версией данных.
+PAGE_USERS_KEY = 'page_users:{}'
+
+
+def _once(request, key, compute):
+    """Значение, которое нужно и ETag, и view: считается раз за запрос."""
+    values = request.__dict__.setdefault('_conditional', {})
+    if key not in values:
+        values[key] = compute()
+    return values[key]
+
+
+def _found(obj):
+    if obj is None:
+        raise Http404
+    return obj
+
+
+def get_group(request, slug):
+    return _found(_once(
+        request, ('group', slug),
+        lambda: Group.objects.filter(slug=slug).first()
+    ))
+
+
+def get_author(request, username):
+    return _found(_once(
+        request, ('author', username),
+        lambda: User.objects.filter(username=username).first()
+    ))
+
+
+def get_post(request, post_id):
+    return _found(_once(
+        request, ('post', post_id),
+        lambda: Post.objects.filter(pk=post_id).first()
+    ))
+
+
+def get_follow_version(request):
+    return _once(
+        request, ('follow',), lambda: follow_version(request.user)
+    )
+
+
+def _etag(request, *parts):
+    """ETag страницы: версия данных и то, что зависит от пользователя.
+
+    Для авторизованного пользователя в ETag входит его id и CSRF-токен
+    из cookie: страница выводит его имя и формы с токеном.
+    """
+    if request.user.is_authenticated:
+        parts += (str(request.user.pk), request.META.get('CSRF_COOKIE', ''))
+    return hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+
+def _page_users_key(request, data_version):
+    return PAGE_USERS_KEY.format(hashlib.md5(
+        f'{request.get_full_path()}|{data_version}'.encode()
+    ).hexdigest())
+
+
+def remember_users(request, user_ids):
+    """Запоминает авторов, выведенных страницей: от них зависит ETag.
+
+    Вызывается view после выборки страницы; версия данных уже посчитана
+    ETag-функцией этого запроса.
+    """
+    data_version = request._conditional[('data',)]
+    cache.set(
+        _page_users_key(request, data_version),
+        sorted(set(user_ids)),
+        settings.FEED_CACHE_TIMEOUT
+    )
+
+
+def _page_etag(request, data_version, *user_ids):
+    """ETag страницы, которая выводит имена заранее неизвестных авторов.
+
+    Пока view не запомнила авторов страницы, ETag нет: ответ строится
+    целиком, а ETag ему ставит conditional после view.
+    """
+    data_version = _once(request, ('data',), lambda: data_version)
+    shown = cache.get(_page_users_key(request, data_version))
+    if shown is None:
+        return None
+    return _etag(
+        request, data_version, version(*user_scopes((*user_ids, *shown)))
+    )
+
+
+def index_etag(request):
+    return _page_etag(request, list_version('index'))
+
+
+def group_etag(request, slug):
+    try:
+        group = get_group(request, slug)
+    except Http404:
+        return None
+    return _page_etag(request, list_version(f'group:{group.pk}'))
+
+
+def profile_etag(request, username):
+    try:
+        author = get_author(request, username)
+    except Http404:
+        return None
+    scopes = [f'author:{author.pk}', f'user:{author.pk}']
+    if request.user.is_authenticated:
+        # Кнопка подписки зависит от подписок пользователя.
+        scopes.append(f'follow:{request.user.pk}')
+    return _etag(request, list_version(*scopes))
+
+
+def post_etag(request, post_id):
+    try:
+        post = get_post(request, post_id)
+    except Http404:
+        return None
+    return _page_etag(
+        request,
+        list_version(
+            f'post:{post.pk}', f'author:{post.author_id}',
+            f'comments:{post.pk}'
+        ),
+        post.author_id,
+    )
+
+
+def follow_etag(request):
+    if not request.user.is_authenticated:
+        # Анонима login_required отправит на вход, кэшировать нечего.
+        return None
+    return _page_etag(request, get_follow_version(request))
+
+
+def conditional(etag_func):
+    """Отвечает 304, если ETag страницы не изменился.
+
+    ETag считается до view одним поиском по индексу, поэтому при
+    совпадении не строятся ни Paginator, ни шаблон; найденный объект
+    view берет через get_group, get_author или get_post. Ответы
+    анонимам могут храниться в общих кэшах, ответы пользователям -
+    только в браузере, и каждый раз перепроверяются.
+    """
+    def decorator(view):
+        conditional_view = condition(etag_func=etag_func)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.has_header(
+                'ETag'
+            ):
+                # Авторы страницы стали известны только во время view.
+                etag = etag_func(request, *args, **kwargs)
+                if etag is not None:
+                    response['ETag'] = quote_etag(etag)
+            if request.user.is_authenticated:
+                patch_cache_control(response, private=True, no_cache=True)
+            else:
+                patch_cache_control(
+                    response,
+                    public=True,
+                    max_age=settings.ANONYMOUS_CACHE_MAX_AGE,
+                    must_revalidate=True,
+                )
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        wrapper.etag_func = etag_func
+        return wrapper
+    return decorator
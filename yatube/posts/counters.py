@@ -0,0 +1,72 @@
+from itertools import islice
+
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import AuthorStats, Comment, Follow, Post, User
+
+BATCH_SIZE = 500
+# Счетчик: модель и поле, по которому записи относятся к пользователю.
+COUNTERS = {
+    'posts_count': (Post, 'author'),
+    'comments_count': (Comment, 'author'),
+    'followers_count': (Follow, 'author'),
+    'following_count': (Follow, 'user'),
+}
+
+
+def change(user_id, **deltas):
+    """Атомарно меняет счетчики пользователя выражениями F()."""
+    AuthorStats.objects.filter(user_id=user_id).update(**{
+        name: Greatest(F(name) + delta, 0) for name, delta in deltas.items()
+    })
+
+
+def _actual_count(model, field):
+    counts = model.objects.filter(
+        **{field: OuterRef('pk')}
+    ).order_by().values(field).annotate(count=Count('pk')).values('count')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def recount(users=None):
+    """Пересчитывает счетчики по данным; возвращает число исправленных.
+
+    Изменения, сделанные сигналами во время пересчета, могут быть
+    перезаписаны, поэтому команду лучше запускать в спокойное время.
+    """
+    if users is None:
+        users = User.objects.all()
+    rows = users.order_by('pk').annotate(**{
+        name: _actual_count(*source) for name, source in COUNTERS.items()
+    }).values_list('pk', *COUNTERS).iterator()
+    repaired = 0
+    while True:
+        chunk = list(islice(rows, BATCH_SIZE))
+        if not chunk:
+            return repaired
+        stored = AuthorStats.objects.in_bulk([row[0] for row in chunk])
+        missing = []
+        changed = []
+        for user_id, *counts in chunk:
+            stats = AuthorStats(user_id=user_id, **dict(zip(COUNTERS, counts)))
+            current = stored.get(user_id)
+            if current is None:
+                missing.append(stats)
+            elif any(
+                getattr(current, name) != getattr(stats, name)
+                for name in COUNTERS
+            ):
+                changed.append(stats)
+        AuthorStats.objects.bulk_create(missing, ignore_conflicts=True)
+        AuthorStats.objects.bulk_update(changed, list(COUNTERS))
+        repaired += len(missing) + len(changed)
+
+
+def for_user(user):
+    """Счетчики пользователя; отсутствующие пересчитываются."""
+    try:
+        return user.stats
+    except AuthorStats.DoesNotExist:
+        recount(User.objects.filter(pk=user.pk))
+        return AuthorStats.objects.get(user=user)
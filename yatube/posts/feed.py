@@ -0,0 +1,213 @@
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Q
+
+from .models import AuthorStats, FeedEntry, Follow, Post
+
+
+# Последние FOLLOW_FEED_BACKFILL_LIMIT постов каждого из авторов порции
+# в ленты всех их подписчиков.
+MATERIALIZE_SQL = (
+    'INSERT INTO {entries} (user_id, post_id, author_id, pub_date) '
+    'SELECT f.user_id, p.id, p.author_id, p.pub_date FROM {follows} f '
+    'JOIN (SELECT id, author_id, pub_date, ROW_NUMBER() OVER ('
+    'PARTITION BY author_id ORDER BY pub_date DESC, id DESC) AS position '
+    'FROM {posts} WHERE author_id IN ({authors})) p '
+    'ON p.author_id = f.author_id WHERE p.position <= %s '
+    # Записи, добавленные сигналами во время заполнения.
+    'ON CONFLICT DO NOTHING'
+)
+
+
+def _stats(author_id):
+    return AuthorStats.objects.filter(user_id=author_id).values_list(
+        'followers_count', 'feed_pending'
+    ).first() or (0, False)
+
+
+def followers_count(author_id):
+    """Число подписчиков автора из счетчиков, без подсчета подписок."""
+    return _stats(author_id)[0]
+
+
+def is_celebrity(author_id):
+    """Проверяет, что посты автора читаются на лету, а не раскладываются.
+
+    Так читаются посты авторов со слишком большим для рассылки числом
+    подписчиков и авторов, ленты подписчиков которых ждут дозаполнения.
+    """
+    count, pending = _stats(author_id)
+    return pending or count > settings.FOLLOW_FEED_FANOUT_LIMIT
+
+
+def celebrity_authors(user):
+    """Авторы из подписок пользователя, чьи посты читаются на лету.
+
+    Число подписчиков берется из AuthorStats: это поиск по первичному
+    ключу для каждой подписки, а не подсчет всех подписок авторов.
+    """
+    return user.follower.filter(
+        Q(author__stats__followers_count__gt=(
+            settings.FOLLOW_FEED_FANOUT_LIMIT
+        ))
+        | Q(author__stats__feed_pending=True)
+    ).values_list('author', flat=True)
+
+
+def _bulk_insert(entries):
+    FeedEntry.objects.bulk_create(
+        entries,
+        batch_size=settings.FOLLOW_FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    if (
+        not settings.FOLLOW_FEED_MATERIALIZED
+        or is_celebrity(post.author_id)
+    ):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    _bulk_insert(
+        FeedEntry(
+            user_id=user_id,
+            post_id=post.pk,
+            author_id=post.author_id,
+            pub_date=post.pub_date,
+        )
+        for user_id in followers.iterator()
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту подписчика последние посты автора.
+
+    Берется не больше FOLLOW_FEED_BACKFILL_LIMIT постов: подписка не
+    копирует всю историю автора.
+    """
+    if (
+        not settings.FOLLOW_FEED_MATERIALIZED
+        or is_celebrity(author_id)
+    ):
+        return
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-pk'
+    ).values_list('pk', 'pub_date')[:settings.FOLLOW_FEED_BACKFILL_LIMIT]
+    _bulk_insert(
+        FeedEntry(
+            user_id=user_id,
+            post_id=post_id,
+            author_id=author_id,
+            pub_date=pub_date,
+        )
+        for post_id, pub_date in posts.iterator()
+    )
+
+
+def prune(user_id, author_id):
+    """Убирает посты автора из ленты отписавшегося пользователя.
+
+    Если автор после отписки перестал считаться знаменитостью, его посты
+    читаются на лету, пока rebuild_follow_feed --pending не разложит их
+    по лентам оставшихся подписчиков: запрос отписки их не заполняет.
+    """
+    if not settings.FOLLOW_FEED_MATERIALIZED:
+        return
+    FeedEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+    limit = settings.FOLLOW_FEED_FANOUT_LIMIT
+    # Счетчик уже уменьшен сигналом: автор только что вышел из знаменитостей.
+    if limit and followers_count(author_id) == limit:
+        AuthorStats.objects.filter(user_id=author_id).update(
+            feed_pending=True
+        )
+
+
+def _materialize(author_ids):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            MATERIALIZE_SQL.format(
+                entries=FeedEntry._meta.db_table,
+                follows=Follow._meta.db_table,
+                posts=Post._meta.db_table,
+                authors=', '.join(['%s'] * len(author_ids)),
+            ),
+            [*author_ids, settings.FOLLOW_FEED_BACKFILL_LIMIT]
+        )
+
+
+def _batches(authors):
+    """Порции id авторов по FOLLOW_FEED_BATCH_SIZE по ключу pk."""
+    last_pk = 0
+    while True:
+        batch = list(
+            authors.filter(pk__gt=last_pk)[:settings.FOLLOW_FEED_BATCH_SIZE]
+        )
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1]
+
+
+def rebuild():
+    """Полностью пересобирает материализованные ленты подписок.
+
+    Ленты заполняются запросами INSERT ... SELECT, по одному на порцию
+    из FOLLOW_FEED_BATCH_SIZE авторов; знаменитости пропускаются.
+    Счетчики подписчиков должны быть актуальны.
+    """
+    FeedEntry.objects.all().delete()
+    AuthorStats.objects.filter(feed_pending=True).update(feed_pending=False)
+    if not settings.FOLLOW_FEED_MATERIALIZED:
+        return
+    authors = AuthorStats.objects.filter(
+        followers_count__gt=0,
+        followers_count__lte=settings.FOLLOW_FEED_FANOUT_LIMIT,
+    ).order_by('pk').values_list('pk', flat=True)
+    for batch in _batches(authors):
+        _materialize(batch)
+
+
+def rebuild_pending():
+    """Раскладывает посты авторов, вернувшихся под FOLLOW_FEED_FANOUT_LIMIT.
+
+    Отметка снимается до заполнения: новые посты автора после этого
+    раскладываются сигналами, а опубликованные раньше добавит запрос.
+    Возвращает число авторов.
+    """
+    authors = AuthorStats.objects.filter(feed_pending=True).order_by(
+        'pk'
+    ).values_list('pk', flat=True)
+    rebuilt = 0
+    for batch in _batches(authors):
+        AuthorStats.objects.filter(pk__in=batch).update(feed_pending=False)
+        below_limit = list(AuthorStats.objects.filter(
+            pk__in=batch,
+            followers_count__lte=settings.FOLLOW_FEED_FANOUT_LIMIT,
+        ).values_list('pk', flat=True))
+        if settings.FOLLOW_FEED_MATERIALIZED and below_limit:
+            _materialize(below_limit)
+        rebuilt += len(batch)
+    return rebuilt
+
+
+def follow_feed(user):
+    """Посты авторов, на которых подписан пользователь."""
+    if not settings.FOLLOW_FEED_MATERIALIZED:
+        return Post.objects.filter(
+            author__in=user.follower.values_list('author')
+        )
+    celebrities = list(celebrity_authors(user))
+    if not celebrities:
+        # Сортировка по полям записи ленты читает ее индекс без сортировки.
+        return Post.objects.filter(feed_entries__user=user).annotate(
+            feed_pub_date=F('feed_entries__pub_date'),
+            feed_post=F('feed_entries__post'),
+        ).order_by('-feed_pub_date', '-feed_post')
+    entries = FeedEntry.objects.filter(user=user).values('post')
+    return Post.objects.filter(
+        Q(pk__in=entries) | Q(author__in=celebrities)
+    )
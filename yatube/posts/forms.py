@@ -1,4 +1,5 @@
 from django import forms
+from django.conf import settings
 
 from .models import Post, Comment
 
@@ -13,6 +14,34 @@ class PostForm(forms.ModelForm):
 
         fields = ('text', 'group', 'image')
 
+    def __init__(self, *args, upload_errors=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.upload_errors = upload_errors or {}
+
+    def clean_image(self):
+        """Проверяет картинку по заголовку, не раскодируя ее целиком."""
+        image = self.cleaned_data['image']
+        header = getattr(image, 'image', None)
+        if header is None:
+            return image
+        if header.format not in settings.POST_IMAGE_ALLOWED_FORMATS:
+            raise forms.ValidationError(
+                'Допустимые форматы: '
+                + ', '.join(settings.POST_IMAGE_ALLOWED_FORMATS)
+            )
+        width, height = header.size
+        if width * height > settings.POST_IMAGE_MAX_PIXELS:
+            raise forms.ValidationError(
+                f'Картинка {width}x{height} слишком велика'
+            )
+        return image
+
+    def clean(self):
+        cleaned_data = super().clean()
+        for field, error in self.upload_errors.items():
+            self.add_error(field, error)
+        return cleaned_data
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
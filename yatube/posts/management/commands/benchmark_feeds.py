@@ -0,0 +1,48 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержки, запросы к базе и память лент через тестовый '
+        'клиент и выводит результат в JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument(
+            '--modes',
+            nargs='+',
+            choices=('cold', 'warm'),
+            default=('cold', 'warm'),
+            help='cold - без кэша, warm - с готовыми фрагментами',
+        )
+        parser.add_argument(
+            '--output', help='Файл для результата; по умолчанию - вывод'
+        )
+        parser.add_argument(
+            '--compare', help='Результат прошлого запуска для сравнения'
+        )
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat должен быть больше нуля')
+        result = benchmark.run(options['repeat'], options['modes'])
+        data = json.dumps(result, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(data)
+        else:
+            self.stdout.write(data)
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as file:
+                baseline = json.load(file)
+            for row in benchmark.compare(baseline, result):
+                self.stderr.write(
+                    '{:<14} {:<5} {:<15} {:>12} {:>12} {:>+8.1f}%'.format(
+                        *row
+                    )
+                )
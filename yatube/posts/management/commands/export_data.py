@@ -0,0 +1,63 @@
+import csv
+import json
+
+from django.conf import settings
+from django.core.management.base import (
+    BaseCommand, CommandError, OutputWrapper
+)
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = 'Выгружает группы, посты, комментарии и подписки в JSON Lines/CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format', choices=('jsonl', 'csv'), default='jsonl'
+        )
+        parser.add_argument(
+            '--models',
+            nargs='+',
+            choices=tuple(transfer.FIELDS),
+            default=tuple(transfer.FIELDS),
+            help='Модели для выгрузки; в CSV - ровно одна',
+        )
+        parser.add_argument(
+            '--output', default='-', help='Файл; "-" - стандартный вывод'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.TRANSFER_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        models = options['models']
+        if options['format'] == 'csv' and len(models) != 1:
+            raise CommandError('В CSV выгружается одна модель за раз')
+        if options['output'] == '-':
+            self._export(self.stdout, models, options)
+            return
+        with open(
+            options['output'], 'w', encoding='utf-8', newline=''
+        ) as file:
+            self._export(OutputWrapper(file), models, options)
+
+    def _export(self, stream, models, options):
+        exported = 0
+        for name in models:
+            records = transfer.export(name, options['batch_size'])
+            if options['format'] == 'csv':
+                writer = csv.DictWriter(
+                    stream, transfer.FIELDS[name], lineterminator='\n'
+                )
+                writer.writeheader()
+                for record in records:
+                    writer.writerow(record)
+                    exported += 1
+                continue
+            for record in records:
+                stream.write(
+                    json.dumps({'model': name, **record}, ensure_ascii=False)
+                )
+                exported += 1
+        self.stderr.write(f'Выгружено записей: {exported}')
@@ -0,0 +1,79 @@
+import csv
+import json
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+
+
+def jsonl_records(file):
+    for number, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            yield record.pop('model'), record
+        except (ValueError, KeyError, AttributeError):
+            raise CommandError(f'Строка {number}: ожидается запись JSON')
+
+
+def csv_records(file, name):
+    for record in csv.DictReader(file):
+        yield name, record
+
+
+class Command(BaseCommand):
+    help = 'Загружает данные, выгруженные командой export_data'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл; "-" - стандартный ввод'
+        )
+        parser.add_argument(
+            '--format', choices=('jsonl', 'csv'), default='jsonl'
+        )
+        parser.add_argument(
+            '--model',
+            choices=tuple(transfer.FIELDS),
+            help='Модель записей CSV',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.TRANSFER_BATCH_SIZE
+        )
+        parser.add_argument(
+            '--skip-refresh',
+            action='store_true',
+            help=(
+                'Не пересобирать счетчики, ленты и поисковый индекс; '
+                'для загрузки из нескольких файлов подряд'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if options['format'] == 'csv' and not options['model']:
+            raise CommandError('Для CSV укажите --model')
+        if options['path'] == '-':
+            loaded = self._load(sys.stdin, options)
+        else:
+            with open(
+                options['path'], encoding='utf-8', newline=''
+            ) as file:
+                loaded = self._load(file, options)
+        if not options['skip_refresh']:
+            transfer.refresh()
+        for name, count in loaded.items():
+            if count:
+                self.stdout.write(f'{name}: {count}')
+        self.stdout.write(self.style.SUCCESS('Загрузка завершена'))
+
+    def _load(self, file, options):
+        if options['format'] == 'csv':
+            records = csv_records(file, options['model'])
+        else:
+            records = jsonl_records(file)
+        try:
+            return transfer.load(records, options['batch_size'])
+        except ValueError as error:
+            raise CommandError(error)
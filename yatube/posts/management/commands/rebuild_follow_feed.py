@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from posts import feed
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает материализованные ленты подписок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pending',
+            action='store_true',
+            help='Только дозаполнить ленты подписчиков авторов, '
+                 'переставших быть знаменитостями',
+        )
+
+    def handle(self, *args, **options):
+        if options['pending']:
+            rebuilt = feed.rebuild_pending()
+            self.stdout.write(
+                self.style.SUCCESS(f'Дозаполнены ленты авторов: {rebuilt}')
+            )
+            return
+        feed.rebuild()
+        self.stdout.write(self.style.SUCCESS('Ленты подписок пересобраны'))
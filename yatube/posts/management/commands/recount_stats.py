@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает и исправляет счетчики авторов'
+
+    def handle(self, *args, **options):
+        repaired = counters.recount()
+        self.stdout.write(
+            self.style.SUCCESS(f'Исправлено счетчиков: {repaired}')
+        )
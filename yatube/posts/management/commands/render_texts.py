@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import caching, markup
+from posts.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново строит HTML текстов и начала постов, например после '
+        'изменения POST_EXCERPT_LENGTH'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.TRANSFER_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        for model, fields in (
+            (Post, markup.post_html),
+            (Comment, markup.comment_html),
+        ):
+            rendered = markup.rerender(model, fields, options['batch_size'])
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'{model._meta.verbose_name_plural}: {rendered}'
+                )
+            )
+        # Закэшированные страницы построены по старому HTML.
+        caching.bump(caching.ROOT_SCOPE)
@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = 'Создает синтетических пользователей, посты, комментарии и подписки'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=30000)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Среднее число подписок пользователя'
+        )
+        parser.add_argument(
+            '--images', type=int, default=10,
+            help='Число разных картинок'
+        )
+        parser.add_argument(
+            '--image-ratio', type=float, default=0.3,
+            help='Доля постов с картинкой'
+        )
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.TRANSFER_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        loaded = benchmark.seed(
+            users=options['users'],
+            posts=options['posts'],
+            comments=options['comments'],
+            groups=options['groups'],
+            follows=options['follows'],
+            images=options['images'],
+            image_ratio=options['image_ratio'],
+            days=options['days'],
+            batch_size=options['batch_size'],
+            random_seed=options['seed'],
+        )
+        for name, count in loaded.items():
+            self.stdout.write(f'{name}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            'Данные созданы; варианты картинок создаст thumbnail_worker'
+        ))
@@ -0,0 +1,68 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts import thumbnails
+
+
+def process_in_thread(job):
+    try:
+        thumbnails.process(job)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        'Создает варианты картинок постов из очереди и удаляет '
+        'картинки без постов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Разобрать очередь и завершиться',
+        )
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help='Вернуть в очередь неудачные задачи',
+        )
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            retried = thumbnails.retry_failed()
+            self.stdout.write(f'Возвращено в очередь: {retried}')
+        workers = settings.THUMBNAIL_WORKERS
+        executor = None
+        if workers > 1:
+            executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix='thumbnails'
+            )
+        processed = 0
+        try:
+            while True:
+                jobs = thumbnails.claim(workers * 4)
+                if not jobs:
+                    if thumbnails.sweep(workers * 4):
+                        continue
+                    if options['once']:
+                        break
+                    time.sleep(settings.THUMBNAIL_POLL_INTERVAL)
+                    continue
+                if executor is None:
+                    for job in jobs:
+                        thumbnails.process(job)
+                else:
+                    list(executor.map(process_in_thread, jobs))
+                processed += len(jobs)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        self.stdout.write(
+            self.style.SUCCESS(f'Обработано картинок: {processed}')
+        )
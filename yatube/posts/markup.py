@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+
+
+def render(text):
+    """HTML текста: разметка экранируется, переносы становятся <p> и <br>."""
+    return linebreaks(text, autoescape=True)
+
+
+def render_excerpt(text):
+    """HTML начала текста не длиннее POST_EXCERPT_LENGTH символов."""
+    return render(Truncator(text).chars(settings.POST_EXCERPT_LENGTH))
+
+
+def post_html(text):
+    return {'text_html': render(text), 'excerpt_html': render_excerpt(text)}
+
+
+def comment_html(text):
+    return {'text_html': render(text)}
+
+
+def rerender(model, fields, batch_size):
+    """Заново строит HTML всех записей модели порциями по ключу pk.
+
+    fields - post_html или comment_html. Записи обновляются bulk_update,
+    без сигналов.
+    """
+    names = list(fields(''))
+    last_pk = 0
+    rendered = 0
+    while True:
+        batch = list(
+            model.objects.filter(pk__gt=last_pk).order_by('pk').only(
+                'pk', 'text'
+            )[:batch_size]
+        )
+        if not batch:
+            return rendered
+        for obj in batch:
+            for name, value in fields(obj.text).items():
+                setattr(obj, name, value)
+        model.objects.bulk_update(batch, names)
+        last_pk = batch[-1].pk
+        rendered += len(batch)
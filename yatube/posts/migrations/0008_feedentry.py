@@ -0,0 +1,83 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Значения настроек FOLLOW_FEED_* на момент миграции: посты знаменитостей
+# не раскладываются, подписчик получает последние посты автора.
+FANOUT_LIMIT = 1000
+BACKFILL_LIMIT = 100
+BATCH_SIZE = 500
+FILL_SQL = (
+    'INSERT INTO {entries} (user_id, post_id, author_id, pub_date) '
+    'SELECT f.user_id, p.id, p.author_id, p.pub_date FROM {follows} f '
+    'JOIN (SELECT id, author_id, pub_date, ROW_NUMBER() OVER ('
+    'PARTITION BY author_id ORDER BY pub_date DESC, id DESC) AS position '
+    'FROM {posts} WHERE author_id IN ({authors})) p '
+    'ON p.author_id = f.author_id WHERE p.position <= %s'
+)
+
+
+def fill_feed(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    FeedEntry = apps.get_model('posts', 'FeedEntry')
+    authors = Follow.objects.values('author').annotate(
+        followers=models.Count('id')
+    ).filter(followers__lte=FANOUT_LIMIT).order_by('author').values_list(
+        'author', flat=True
+    )
+    last_pk = 0
+    while True:
+        batch = list(authors.filter(author__gt=last_pk)[:BATCH_SIZE])
+        if not batch:
+            return
+        schema_editor.execute(
+            FILL_SQL.format(
+                entries=FeedEntry._meta.db_table,
+                follows=Follow._meta.db_table,
+                posts=Post._meta.db_table,
+                authors=', '.join(['%s'] * len(batch)),
+            ),
+            [*batch, BACKFILL_LIMIT]
+        )
+        last_pk = batch[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0007_auto_20220617_0003'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата публикации')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='posts.Post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Запись ленты',
+                'verbose_name_plural': 'Записи ленты',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['user', '-pub_date'], name='feed_user_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['user', 'author'], name='feed_user_author_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='feedentry',
+            constraint=models.UniqueConstraint(fields=('user', 'post'), name='unique_feed_entry'),
+        ),
+        migrations.RunPython(fill_feed, migrations.RunPython.noop),
+    ]
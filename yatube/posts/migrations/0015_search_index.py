@@ -0,0 +1,47 @@
+from django.db import migrations
+
+# Таблица FTS5, ее столбцы и запрос, которым она заполняется.
+TABLES = (
+    ('posts_post_search', 'text', 'SELECT id, text FROM posts_post'),
+    (
+        'posts_comment_search',
+        'text, post_id',
+        'SELECT id, text, post_id FROM posts_comment',
+    ),
+)
+UNINDEXED = {'post_id'}
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table, columns, source in TABLES:
+        definition = ', '.join(
+            f'{column} UNINDEXED' if column in UNINDEXED else column
+            for column in columns.split(', ')
+        )
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE {table} USING fts5('
+            f"{definition}, tokenize='unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f'INSERT INTO {table} (rowid, {columns}) {source}'
+        )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table, columns, source in TABLES:
+        schema_editor.execute(f'DROP TABLE {table}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_thumbnailjob'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
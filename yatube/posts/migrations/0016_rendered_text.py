@@ -0,0 +1,71 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:27
+
+from django.db import migrations, models
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+
+# Копия posts.markup на момент миграции: ее результат не должен зависеть
+# от будущих изменений разметки. Новую разметку применяет render_texts.
+EXCERPT_LENGTH = 300
+BATCH_SIZE = 1000
+
+
+def render(text):
+    return linebreaks(text, autoescape=True)
+
+
+def post_html(text):
+    return {
+        'text_html': render(text),
+        'excerpt_html': render(Truncator(text).chars(EXCERPT_LENGTH)),
+    }
+
+
+def comment_html(text):
+    return {'text_html': render(text)}
+
+
+def render_texts(apps, schema_editor):
+    for model_name, fields in (('Post', post_html), ('Comment', comment_html)):
+        model = apps.get_model('posts', model_name)
+        names = list(fields(''))
+        last_pk = 0
+        while True:
+            batch = list(
+                model.objects.filter(pk__gt=last_pk).order_by('pk').only(
+                    'pk', 'text'
+                )[:BATCH_SIZE]
+            )
+            if not batch:
+                break
+            for obj in batch:
+                for name, value in fields(obj.text).items():
+                    setattr(obj, name, value)
+            model.objects.bulk_update(batch, names)
+            last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt_html',
+            field=models.TextField(blank=True, editable=False, help_text='Выводится в лентах вместо полного текста', verbose_name='HTML начала текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML текста'),
+        ),
+        migrations.RunPython(render_texts, migrations.RunPython.noop),
+    ]
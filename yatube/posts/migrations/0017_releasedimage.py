@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_rendered_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReleasedImage',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', models.CharField(max_length=100, unique=True, verbose_name='Картинка')),
+                ('released', models.DateTimeField(db_index=True, verbose_name='Дата освобождения')),
+            ],
+            options={
+                'verbose_name': 'Освобожденная картинка',
+                'verbose_name_plural': 'Освобожденные картинки',
+            },
+        ),
+    ]
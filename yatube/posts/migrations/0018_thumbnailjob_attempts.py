@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_releasedimage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='thumbnailjob',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Попытки'),
+        ),
+        migrations.AddField(
+            model_name='thumbnailjob',
+            name='failed',
+            field=models.BooleanField(default=False, verbose_name='Не удалось создать'),
+        ),
+    ]
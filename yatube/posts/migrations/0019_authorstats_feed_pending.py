@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_thumbnailjob_attempts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authorstats',
+            name='feed_pending',
+            field=models.BooleanField(default=False, help_text='Посты автора читаются на лету до rebuild_follow_feed --pending', verbose_name='Ленты подписчиков не дозаполнены'),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 
+from .storage import ContentAddressedStorage
+
 User = get_user_model()
 
 
@@ -17,11 +19,29 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты для лент: только поля, которые выводят шаблоны."""
+        return self.select_related('author', 'group').only(
+            'excerpt_html', 'pub_date', 'image', 'image_variants',
+            'author_id', 'group_id',
+            'author__username', 'author__first_name', 'author__last_name',
+            'group__slug',
+        )
+
+
 class Post(models.Model):
     text = models.TextField(
         'Текст поста',
         help_text='Введите текст поста',
     )
+    text_html = models.TextField('HTML текста', blank=True, editable=False)
+    excerpt_html = models.TextField(
+        'HTML начала текста',
+        blank=True,
+        editable=False,
+        help_text='Выводится в лентах вместо полного текста',
+    )
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
     author = models.ForeignKey(
         User,
@@ -41,13 +61,37 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
-        blank=True
+        storage=ContentAddressedStorage(),
+        blank=True,
+        db_index=True
+    )
+    image_variants = models.TextField(
+        'Варианты картинки',
+        blank=True,
+        editable=False,
+        help_text='JSON с адресами вариантов картинки',
     )
 
+    objects = PostQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
-        ordering = ('-pub_date', )
+        ordering = ('-pub_date', '-id')
+        indexes = [
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='post_pub_date_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=('group', '-pub_date', '-id'),
+                name='post_group_pub_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -65,11 +109,19 @@ class Comment(models.Model):
         related_name='comments'
     )
     text = models.TextField('Текст комментария')
+    text_html = models.TextField('HTML текста', blank=True, editable=False)
     created = models.DateTimeField('Дата комментария', auto_now_add=True)
 
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        ordering = ('created', 'id')
+        indexes = [
+            models.Index(
+                fields=('post', 'created'),
+                name='comment_post_created_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -104,3 +156,109 @@ class Follow(models.Model):
     def __str__(self):
         return (f'Пользователь {self.user.username}'
                 f' подписан на пользователя {self.author.username}')
+
+
+class FeedEntry(models.Model):
+    """Запись материализованной ленты подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_feed_entry'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=('user', '-pub_date', '-post'),
+                name='feed_user_pub_date_idx'
+            ),
+            models.Index(
+                fields=('user', 'author'),
+                name='feed_user_author_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id}: {self.post_id}'
+
+
+class AuthorStats(models.Model):
+    """Денормализованные счетчики пользователя."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    comments_count = models.PositiveIntegerField('Комментариев', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+    feed_pending = models.BooleanField(
+        'Ленты подписчиков не дозаполнены',
+        default=False,
+        help_text='Посты автора читаются на лету до rebuild_follow_feed '
+                  '--pending',
+    )
+
+    class Meta:
+        verbose_name = 'Счетчики автора'
+        verbose_name_plural = 'Счетчики авторов'
+
+    def __str__(self):
+        return f'{self.user_id}: {self.posts_count}'
+
+
+class ThumbnailJob(models.Model):
+    """Картинка в очереди на создание вариантов.
+
+    После THUMBNAIL_MAX_ATTEMPTS неудачных попыток задача остается в
+    таблице с failed и больше не разбирается.
+    """
+    image = models.CharField('Картинка', max_length=100, unique=True)
+    created = models.DateTimeField('Дата постановки', auto_now_add=True)
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    failed = models.BooleanField('Не удалось создать', default=False)
+
+    class Meta:
+        verbose_name = 'Задача на варианты картинки'
+        verbose_name_plural = 'Задачи на варианты картинок'
+
+    def __str__(self):
+        return self.image
+
+
+class ReleasedImage(models.Model):
+    """Картинка, на которую перестал ссылаться пост.
+
+    Файл удаляет thumbnail_worker, когда ссылок на него так и не
+    появилось и его давно не загружали.
+    """
+    image = models.CharField('Картинка', max_length=100, unique=True)
+    released = models.DateTimeField('Дата освобождения', db_index=True)
+
+    class Meta:
+        verbose_name = 'Освобожденная картинка'
+        verbose_name_plural = 'Освобожденные картинки'
+
+    def __str__(self):
+        return self.image
@@ -0,0 +1,274 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Max, Q
+from django.utils.functional import cached_property
+
+from .caching import version
+
+FEED_COUNT_KEY = 'feed_count:{}:{}'
+
+
+def feed_count_key(scope):
+    """Ключ числа постов ленты; устаревает вместе с общим поколением."""
+    return FEED_COUNT_KEY.format(scope, version())
+
+
+def change_feed_counts(scopes, delta):
+    """Обновляет счетчики постов лент, если они уже есть в кэше."""
+    for scope in scopes:
+        try:
+            cache.incr(feed_count_key(scope), delta)
+        except ValueError:
+            pass
+
+
+def encode_cursor(values):
+    """Упаковывает значения ключа сортировки в токен для адресной строки."""
+    raw = json.dumps([
+        value.isoformat() if hasattr(value, 'isoformat') else value
+        for value in values
+    ])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Распаковывает токен; для испорченного токена возвращает None."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw.decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+class CountedPaginator(Paginator):
+    """Paginator, который берет число постов ленты из кэша.
+
+    Счетчик поддерживается сигналами постов и пересчитывается после
+    FEED_COUNT_TIMEOUT. Для ссылок на страницы строится окно вокруг
+    текущей страницы вместо полного page_range.
+    """
+
+    def __init__(self, object_list, per_page, count_scope=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_scope = count_scope
+
+    @cached_property
+    def count(self):
+        if self.count_scope is None:
+            return super().count
+        key = feed_count_key(self.count_scope)
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.add(key, count, settings.FEED_COUNT_TIMEOUT)
+        return count
+
+    def page_window(self, number):
+        """Номера страниц для вывода; None обозначает пропуск."""
+        on_each_side = settings.PAGINATOR_ON_EACH_SIDE
+        pages = list(range(
+            max(number - on_each_side, 1),
+            min(number + on_each_side, self.num_pages) + 1
+        ))
+        if pages[0] > 1:
+            pages[:0] = [1, None] if pages[0] > 2 else [1]
+        if pages[-1] < self.num_pages:
+            pages += (
+                [None, self.num_pages]
+                if pages[-1] < self.num_pages - 1 else [self.num_pages]
+            )
+        return pages
+
+    def page(self, number):
+        page = super().page(number)
+        page.page_window = self.page_window(page.number)
+        return page
+
+
+def estimate_count(model):
+    """Примерное число строк таблицы без COUNT(*).
+
+    PostgreSQL хранит оценку в pg_class; для других баз берется
+    наибольший первичный ключ, который читается из индекса.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class '
+                'WHERE oid = %s::regclass',
+                [model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        if row is not None and row[0] >= 0:
+            return row[0]
+    return model._default_manager.aggregate(last=Max('pk'))['last'] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator админки для больших таблиц.
+
+    Число строк таблицы без фильтров оценивается, если оценка больше
+    ADMIN_EXACT_COUNT_LIMIT. Отфильтрованная выборка считается не дальше
+    ADMIN_EXACT_COUNT_LIMIT строк.
+    """
+
+    @cached_property
+    def count(self):
+        limit = settings.ADMIN_EXACT_COUNT_LIMIT
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_count(queryset.model)
+            if estimate > limit:
+                return estimate
+        return queryset.order_by()[:limit].count()
+
+
+class CursorPage(Sequence):
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, next_cursor=None,
+                 previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self)} items>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Постраничный вывод по ключу (поле сортировки, уникальное поле).
+
+    Стоимость запроса страницы не зависит от ее глубины: каждая страница
+    начинается с позиции, переданной в токене after или before. Ключ
+    берется из ordering, иначе из сортировки queryset или модели; поля
+    ключа могут быть аннотациями queryset.
+    """
+
+    def __init__(self, object_list, per_page, ordering=None):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(
+            ordering
+            or object_list.query.order_by
+            or object_list.model._meta.ordering
+        )
+        self.keys = [name.lstrip('-') for name in self.ordering]
+        self.descending = self.ordering[0].startswith('-')
+
+    def position(self, obj):
+        return [getattr(obj, key) for key in self.keys]
+
+    def _field(self, name):
+        annotations = self.object_list.query.annotations
+        if name in annotations:
+            return annotations[name].output_field
+        opts = self.object_list.model._meta
+        return opts.pk if name == 'pk' else opts.get_field(name)
+
+    def _parse(self, token):
+        values = decode_cursor(token)
+        if values is None or len(values) != len(self.keys):
+            return None
+        try:
+            return [
+                self._field(key).to_python(value)
+                for key, value in zip(self.keys, values)
+            ]
+        except (ValidationError, TypeError, ValueError):
+            return None
+
+    def _seek(self, position, forward):
+        (field, unique), (value, unique_value) = self.keys, position
+        lookup = 'lt' if self.descending == forward else 'gt'
+        # Нестрогое условие на первое поле дает базе диапазон по индексу.
+        return self.object_list.filter(
+            Q(**{f'{field}__{lookup}e': value}),
+            Q(**{f'{field}__{lookup}': value})
+            | Q(**{field: value, f'{unique}__{lookup}': unique_value})
+        )
+
+    def _backward_ordering(self):
+        return tuple(
+            name[1:] if name.startswith('-') else f'-{name}'
+            for name in self.ordering
+        )
+
+    def get_page(self, after=None, before=None):
+        position = self._parse(before)
+        if position is not None:
+            items = list(
+                self._seek(position, forward=False).order_by(
+                    *self._backward_ordering()
+                )[:self.per_page + 1]
+            )
+            if items:
+                has_previous = len(items) > self.per_page
+                items = items[:self.per_page][::-1]
+                return self._page(items, True, has_previous)
+        position = self._parse(after)
+        queryset = self.object_list
+        if position is not None:
+            queryset = self._seek(position, forward=True)
+        items = list(queryset.order_by(*self.ordering)[:self.per_page + 1])
+        return self._page(
+            items[:self.per_page],
+            len(items) > self.per_page,
+            position is not None,
+        )
+
+    def _page(self, items, has_next, has_previous):
+        next_cursor = previous_cursor = None
+        if items and has_next:
+            next_cursor = encode_cursor(self.position(items[-1]))
+        if items and has_previous:
+            previous_cursor = encode_cursor(self.position(items[0]))
+        return CursorPage(items, self, next_cursor, previous_cursor)
+
+
+def paginate(request, object_list, per_page=None, count_scope=None):
+    """Страница постов по параметрам запроса.
+
+    Токены after/before включают постраничный вывод по ключу, иначе
+    используются номера страниц.
+    """
+    per_page = per_page or settings.COUNT_PAGE_POSTS
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+    if (
+        settings.FEED_PAGINATION == 'cursor'
+        or after is not None
+        or before is not None
+    ):
+        return CursorPaginator(object_list, per_page).get_page(
+            after=after, before=before
+        )
+    paginator = CountedPaginator(object_list, per_page, count_scope)
+    return paginator.get_page(request.GET.get('page'))
@@ -0,0 +1,280 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .models import Comment, Post
+from .paginators import CursorPage, decode_cursor, encode_cursor
+
+POST_TABLE = 'posts_post_search'
+COMMENT_TABLE = 'posts_comment_search'
+TERM = re.compile(r'\w+')
+
+
+def terms(query):
+    """Слова запроса без повторов, не больше SEARCH_MAX_TERMS."""
+    words = dict.fromkeys(TERM.findall(query.lower()))
+    return list(words)[:settings.SEARCH_MAX_TERMS]
+
+
+class SearchBackend:
+    """Полнотекстовый поиск по постам и комментариям к ним.
+
+    search возвращает пары (score, post_id) в порядке выдачи: по
+    возрастанию score, при равенстве - сначала новые посты. Позиции
+    after и before - такие же пары; с before пары идут в обратном порядке.
+    """
+
+    def index_post(self, post):
+        raise NotImplementedError
+
+    def remove_post(self, post_id):
+        raise NotImplementedError
+
+    def index_comment(self, comment):
+        raise NotImplementedError
+
+    def remove_comment(self, comment_id):
+        raise NotImplementedError
+
+    def rebuild(self):
+        """Заполняет индекс заново; возвращает число документов."""
+        raise NotImplementedError
+
+    def search(self, query, limit, after=None, before=None):
+        raise NotImplementedError
+
+
+class SQLiteFTSBackend(SearchBackend):
+    """Индекс SQLite FTS5, таблицы создает миграция 0015.
+
+    rowid документа - первичный ключ поста или комментария, поэтому
+    обновление и удаление не перебирают индекс. Релевантность - bm25;
+    для поста берется лучшая из оценок его текста и комментариев.
+    """
+
+    def _execute(self, sql, params=()):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def index_post(self, post):
+        self._execute(
+            f'INSERT OR REPLACE INTO {POST_TABLE} (rowid, text) '
+            'VALUES (%s, %s)',
+            [post.pk, post.text]
+        )
+
+    def remove_post(self, post_id):
+        self._execute(
+            f'DELETE FROM {POST_TABLE} WHERE rowid = %s', [post_id]
+        )
+
+    def index_comment(self, comment):
+        self._execute(
+            f'INSERT OR REPLACE INTO {COMMENT_TABLE} (rowid, text, post_id) '
+            'VALUES (%s, %s, %s)',
+            [comment.pk, comment.text, comment.post_id]
+        )
+
+    def remove_comment(self, comment_id):
+        self._execute(
+            f'DELETE FROM {COMMENT_TABLE} WHERE rowid = %s', [comment_id]
+        )
+
+    def rebuild(self):
+        for sql in (
+            f'DELETE FROM {POST_TABLE}',
+            f'DELETE FROM {COMMENT_TABLE}',
+            f'INSERT INTO {POST_TABLE} (rowid, text) '
+            f'SELECT id, text FROM {Post._meta.db_table}',
+            f'INSERT INTO {COMMENT_TABLE} (rowid, text, post_id) '
+            f'SELECT id, text, post_id FROM {Comment._meta.db_table}',
+            f"INSERT INTO {POST_TABLE} ({POST_TABLE}) VALUES ('optimize')",
+            f"INSERT INTO {COMMENT_TABLE} ({COMMENT_TABLE}) "
+            "VALUES ('optimize')",
+        ):
+            self._execute(sql)
+        return sum(
+            self._execute(f'SELECT COUNT(*) FROM {table}')[0][0]
+            for table in (POST_TABLE, COMMENT_TABLE)
+        )
+
+    def _documents(self, match, limit, position, reverse):
+        """До limit документов после position в порядке выдачи.
+
+        Каждая таблица отдает не больше limit документов по ключу
+        (rank, post_id), поэтому объединяется и сортируется не больше
+        2 * limit строк.
+        """
+        where, order, params = '', 'rank, post_id DESC', []
+        if reverse:
+            order = 'rank DESC, post_id'
+        if position is not None:
+            sign, tie = ('<', '>') if reverse else ('>', '<')
+            where = f'AND (rank {sign} %s OR (rank = %s AND post_id {tie} %s))'
+            params = [position[0], position[0], position[1]]
+        tables = []
+        for table, post_id in (
+            (POST_TABLE, 'rowid'), (COMMENT_TABLE, 'post_id')
+        ):
+            tables.append(
+                f'SELECT * FROM (SELECT rank, {post_id} AS post_id'
+                f' FROM {table} WHERE {table} MATCH %s {where}'
+                f' ORDER BY {order} LIMIT %s)'
+            )
+        return self._execute(
+            f'SELECT rank, post_id FROM ({" UNION ALL ".join(tables)})'
+            f' ORDER BY {order} LIMIT %s',
+            [match, *params, limit] * 2 + [limit]
+        )
+
+    def _best_scores(self, match, post_ids):
+        """Лучшая оценка каждого из постов по его тексту и комментариям."""
+        placeholders = ', '.join(['%s'] * len(post_ids))
+        return dict(self._execute(
+            'SELECT post_id, MIN(rank) FROM ('
+            f' SELECT rowid AS post_id, rank FROM {POST_TABLE}'
+            f' WHERE {POST_TABLE} MATCH %s AND rowid IN ({placeholders})'
+            ' UNION ALL'
+            f' SELECT post_id, rank FROM {COMMENT_TABLE}'
+            f' WHERE {COMMENT_TABLE} MATCH %s AND rowid IN ('
+            f'  SELECT id FROM {Comment._meta.db_table}'
+            f'  WHERE post_id IN ({placeholders}))'
+            ') GROUP BY post_id',
+            [match, *post_ids, match, *post_ids]
+        ))
+
+    def search(self, query, limit, after=None, before=None):
+        """Посты по лучшей оценке, не перебирая все совпадения.
+
+        Документы читаются порциями в порядке выдачи. Пост найден
+        окончательно, когда чтение дошло до его лучшей оценки; посты,
+        лучшая оценка которых лежит по другую сторону позиции, уже
+        выдавались и пропускаются.
+        """
+        words = terms(query)
+        if not words:
+            return []
+        match = ' '.join(f'"{word}"' for word in words)
+        reverse = before is not None
+        position = before if reverse else after
+
+        def key(hit):
+            score, post_id = hit
+            return (-score, post_id) if reverse else (score, -post_id)
+
+        scores = {}
+        frontier = position
+        while True:
+            documents = self._documents(match, limit, frontier, reverse)
+            new = {post_id for score, post_id in documents} - scores.keys()
+            if new:
+                scores.update(self._best_scores(match, list(new)))
+            exhausted = len(documents) < limit
+            if documents:
+                frontier = tuple(documents[-1])
+            hits = sorted(
+                (
+                    (score, post_id) for post_id, score in scores.items()
+                    if position is None
+                    or key((score, post_id)) > key(position)
+                ),
+                key=key,
+            )
+            if not exhausted:
+                hits = [hit for hit in hits if key(hit) <= key(frontier)]
+            if exhausted or len(hits) >= limit:
+                return hits[:limit]
+
+
+class DatabaseBackend(SearchBackend):
+    """Поиск через LIKE для баз без полнотекстового индекса.
+
+    Не требует индекса, но перебирает все посты; подходит только для
+    разработки. Все найденные посты равны по релевантности.
+    """
+
+    def index_post(self, post):
+        pass
+
+    def remove_post(self, post_id):
+        pass
+
+    def index_comment(self, comment):
+        pass
+
+    def remove_comment(self, comment_id):
+        pass
+
+    def rebuild(self):
+        return 0
+
+    def search(self, query, limit, after=None, before=None):
+        words = terms(query)
+        if not words:
+            return []
+        posts = Post.objects.order_by('-pk')
+        for word in words:
+            posts = posts.filter(
+                Q(text__icontains=word)
+                | Q(pk__in=Comment.objects.filter(
+                    text__icontains=word
+                ).values('post_id'))
+            )
+        if before is not None:
+            posts = posts.filter(pk__gt=before[1]).order_by('pk')
+        elif after is not None:
+            posts = posts.filter(pk__lt=after[1])
+        return [
+            (0.0, post_id)
+            for post_id in posts.values_list('pk', flat=True)[:limit]
+        ]
+
+
+def get_backend():
+    return import_string(settings.SEARCH_BACKEND)()
+
+
+def _position(token):
+    values = decode_cursor(token)
+    if values is None or len(values) != 2:
+        return None
+    try:
+        return float(values[0]), int(values[1])
+    except (TypeError, ValueError):
+        return None
+
+
+def search_page(query, per_page, after=None, before=None):
+    """Страница найденных постов по ключу (score, post_id)."""
+    backend = get_backend()
+    position = _position(before)
+    if position is not None:
+        hits = backend.search(query, per_page + 1, before=position)
+        if hits:
+            return _page(
+                hits[:per_page][::-1], True, len(hits) > per_page
+            )
+    position = _position(after)
+    hits = backend.search(query, per_page + 1, after=position)
+    return _page(hits[:per_page], len(hits) > per_page, position is not None)
+
+
+def _page(hits, has_next, has_previous):
+    posts = Post.objects.for_feed().in_bulk(
+        [post_id for score, post_id in hits]
+    )
+    next_cursor = previous_cursor = None
+    if hits and has_next:
+        next_cursor = encode_cursor(hits[-1])
+    if hits and has_previous:
+        previous_cursor = encode_cursor(hits[0])
+    return CursorPage(
+        [posts[post_id] for score, post_id in hits if post_id in posts],
+        None,
+        next_cursor,
+        previous_cursor,
+    )
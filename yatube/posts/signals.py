@@ -0,0 +1,204 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import caching, counters, feed, markup, search, thumbnails
+from .models import AuthorStats, Comment, Follow, Group, Post, User
+from .paginators import change_feed_counts
+
+
+def reset_generations(**kwargs):
+    """После миграций устаревают все фрагменты: схема могла измениться.
+
+    Сессии, счетчики и варианты картинок в кэше остаются.
+    """
+    caching.bump(caching.ROOT_SCOPE)
+
+
+def _feed_scopes(author_id, group_id):
+    scopes = ['index', f'author:{author_id}']
+    if group_id is not None:
+        scopes.append(f'group:{group_id}')
+    return scopes
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous(sender, instance, **kwargs):
+    instance._previous_group_id = None
+    instance._previous_image = None
+    if instance.pk is not None:
+        instance._previous_group_id, instance._previous_image = (
+            Post.objects.filter(pk=instance.pk).values_list(
+                'group_id', 'image'
+            ).first() or (None, None)
+        )
+
+
+@receiver(pre_save, sender=Post)
+def reset_image_variants(sender, instance, **kwargs):
+    if instance.image.name != instance._previous_image:
+        instance.image_variants = ''
+
+
+@receiver(pre_save, sender=Post)
+def render_post_text(sender, instance, raw=False, **kwargs):
+    if not raw:
+        for name, value in markup.post_html(instance.text).items():
+            setattr(instance, name, value)
+
+
+@receiver(pre_save, sender=Comment)
+def render_comment_text(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance.text_html = markup.render(instance.text)
+
+
+@receiver(post_save, sender=Post)
+def pregenerate_thumbnails(sender, instance, **kwargs):
+    name = instance.image.name
+    previous_image = getattr(instance, '_previous_image', None)
+    if name == previous_image:
+        return
+    if name:
+        thumbnails.prepare(instance)
+    if previous_image:
+        thumbnails.release(previous_image)
+
+
+@receiver(post_delete, sender=Post)
+def release_image(sender, instance, **kwargs):
+    if instance.image.name:
+        thumbnails.release(instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, **kwargs):
+    if created:
+        feed.fan_out(instance)
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, **kwargs):
+    if created:
+        change_feed_counts(
+            _feed_scopes(instance.author_id, instance.group_id), 1
+        )
+        return
+    previous_group_id = getattr(instance, '_previous_group_id', None)
+    if previous_group_id != instance.group_id:
+        if previous_group_id is not None:
+            change_feed_counts([f'group:{previous_group_id}'], -1)
+        if instance.group_id is not None:
+            change_feed_counts([f'group:{instance.group_id}'], 1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    change_feed_counts(_feed_scopes(instance.author_id, instance.group_id), -1)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    search.get_backend().index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.get_backend().remove_post(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, **kwargs):
+    search.get_backend().index_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance, **kwargs):
+    search.get_backend().remove_comment(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def create_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        AuthorStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def count_author_post(sender, instance, created, **kwargs):
+    if created:
+        counters.change(instance.author_id, posts_count=1)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_author_post(sender, instance, **kwargs):
+    counters.change(instance.author_id, posts_count=-1)
+
+
+@receiver(post_save, sender=Comment)
+def count_author_comment(sender, instance, created, **kwargs):
+    if created:
+        counters.change(instance.author_id, comments_count=1)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_author_comment(sender, instance, **kwargs):
+    counters.change(instance.author_id, comments_count=-1)
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, **kwargs):
+    if created:
+        counters.change(instance.author_id, followers_count=1)
+        counters.change(instance.user_id, following_count=1)
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance, **kwargs):
+    counters.change(instance.author_id, followers_count=-1)
+    counters.change(instance.user_id, following_count=-1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def bump_post_generations(sender, instance, **kwargs):
+    scopes = _feed_scopes(instance.author_id, instance.group_id)
+    previous_group_id = getattr(instance, '_previous_group_id', None)
+    if previous_group_id is not None:
+        scopes.append(f'group:{previous_group_id}')
+    caching.bump(f'post:{instance.pk}', *scopes)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def bump_comment_generations(sender, instance, **kwargs):
+    caching.bump(f'comments:{instance.post_id}')
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def bump_group_generations(sender, instance, **kwargs):
+    caching.bump(f'group:{instance.pk}', 'groups')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def bump_user_generations(sender, instance, **kwargs):
+    if kwargs.get('update_fields') == frozenset(('last_login',)):
+        return
+    caching.bump(f'user:{instance.pk}')
+
+
+@receiver(post_save, sender=Follow)
+def backfill_feed(sender, instance, created, **kwargs):
+    if created:
+        feed.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_feed(sender, instance, **kwargs):
+    feed.prune(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def bump_follow_generation(sender, instance, **kwargs):
+    caching.bump(f'follow:{instance.user_id}')
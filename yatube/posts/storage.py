@@ -0,0 +1,84 @@
+import hashlib
+import os
+import posixpath
+import time
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+SHARD_LEVELS = 2
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, в котором имя файла - SHA-256 его содержимого.
+
+    Файлы раскладываются по каталогам из первых символов хэша:
+    posts/ab/cd/abcd...ef.jpg. Одинаковые загрузки получают одно имя и
+    записываются один раз.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def content_name(self, name, content):
+        sha256 = hashlib.sha256()
+        for chunk in content.chunks():
+            sha256.update(chunk)
+        digest = sha256.hexdigest()
+        directory, filename = posixpath.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        return posixpath.join(
+            directory, digest[:2], digest[2:4], f'{digest}{extension}'
+        )
+
+    def _save(self, name, content):
+        name = self.content_name(name, content)
+        try:
+            # Свежая дата изменения не дает delete_unused удалить файл,
+            # имя которого досталось этой загрузке.
+            os.utime(self.path(name))
+            return name
+        except FileNotFoundError:
+            pass
+        # Запись под временным именем и переименование: параллельная
+        # загрузка того же файла не увидит его недописанным.
+        partial_name = f'{name}.{uuid.uuid4().hex}.part'
+        try:
+            partial = super()._save(partial_name, content)
+        except FileNotFoundError:
+            # delete_unused убрал пустой каталог между его созданием и
+            # записью файла.
+            partial = super()._save(partial_name, content)
+        os.replace(self.path(partial), self.path(name))
+        return name
+
+    def delete_unused(self, name, max_age, is_used):
+        """Удаляет файл, если is_used() ложно и его не загружали max_age с.
+
+        Файл сначала переименовывается: загрузка того же содержимого после
+        этого запишет его заново, а не получит имя удаляемого файла.
+        Возвращает True, если файла больше нет.
+        """
+        path = self.path(name)
+        removed = f'{path}.{uuid.uuid4().hex}.del'
+        try:
+            os.replace(path, removed)
+        except FileNotFoundError:
+            return True
+        if time.time() - os.stat(removed).st_mtime < max_age or is_used():
+            os.replace(removed, path)
+            return False
+        os.remove(removed)
+        self._remove_empty_directories(path)
+        return True
+
+    def _remove_empty_directories(self, path):
+        directory = os.path.dirname(path)
+        for _ in range(SHARD_LEVELS):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                return
+            directory = os.path.dirname(directory)
@@ -0,0 +1,11 @@
+from django import template
+
+from .. import cards
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts):
+    """Карточки постов страницы из кэша; рисуются только недостающие."""
+    return cards.render_cards(posts)
@@ -0,0 +1,18 @@
+from django import template
+from django.conf import settings
+
+from .. import thumbnails
+
+register = template.Library()
+
+
+@register.inclusion_tag('posts/includes/picture.html')
+def post_picture(post):
+    """<picture> с вариантами картинки поста; до их создания - заглушка."""
+    if not hasattr(post, 'picture'):
+        thumbnails.resolve([post])
+    return {
+        'image': post.image,
+        'picture': post.picture,
+        'sizes': settings.POST_IMAGE_SIZES,
+    }
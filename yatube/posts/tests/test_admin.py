@@ -0,0 +1,93 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Group, Post, User
+from ..paginators import EstimatedCountPaginator
+
+ADMIN_USERNAME = 'TestAdmin'
+POST_TEXT = 'Тестовый текст'
+POST_CHANGELIST_URL = reverse('admin:posts_post_changelist')
+COMMENT_CHANGELIST_URL = reverse('admin:posts_comment_changelist')
+GROUPS_COUNT = 5
+
+
+class AdminChangelistTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username=ADMIN_USERNAME, email='admin@example.com', password='pw'
+        )
+        cls.groups = [
+            Group.objects.create(
+                title=f'Группа {i}', slug=f'group-{i}', description='-'
+            )
+            for i in range(GROUPS_COUNT)
+        ]
+        cls.post = Post.objects.create(
+            text=POST_TEXT, author=cls.admin, group=cls.groups[0]
+        )
+        Comment.objects.create(post=cls.post, author=cls.admin, text='Ок')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def test_changelists_render(self):
+        """Списки постов и комментариев открываются"""
+        for url in (POST_CHANGELIST_URL, COMMENT_CHANGELIST_URL):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+        self.assertContains(response, POST_TEXT[:15])
+
+    def test_changelist_queries_use_indexes(self):
+        """Списки без DISTINCT по датам и без JOIN с постами"""
+        for url in (POST_CHANGELIST_URL, COMMENT_CHANGELIST_URL):
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    self.client.get(url, {'q': 'О'})
+                sql = [query['sql'] for query in queries]
+                for query in sql:
+                    self.assertNotIn('DISTINCT', query)
+                    if 'FROM "posts_comment"' in query:
+                        self.assertNotIn('"posts_post"', query)
+        self.assertIn('ORDER BY "posts_comment"."id" DESC', ' '.join(sql))
+
+    def test_group_choices_are_not_rendered(self):
+        """Редактируемая группа не выводит в строке все группы"""
+        response = self.client.get(POST_CHANGELIST_URL)
+        for group in self.groups[1:]:
+            with self.subTest(group=group.title):
+                self.assertNotContains(response, group.title)
+
+    @override_settings(ADMIN_EXACT_COUNT_LIMIT=1)
+    def test_large_table_count_is_estimated(self):
+        """Число строк большой таблицы оценивается без COUNT(*)"""
+        Post.objects.create(text=POST_TEXT, author=self.admin)
+        last = Post.objects.create(text=POST_TEXT, author=self.admin)
+        with CaptureQueriesContext(connection) as queries:
+            count = EstimatedCountPaginator(Post.objects.all(), 10).count
+        self.assertEqual(count, last.pk)
+        self.assertFalse(
+            [query for query in queries if 'COUNT(' in query['sql']]
+        )
+
+    @override_settings(ADMIN_EXACT_COUNT_LIMIT=2)
+    def test_filtered_count_is_limited(self):
+        """Отфильтрованная выборка считается не дальше предела"""
+        Post.objects.bulk_create([
+            Post(text=POST_TEXT, author=self.admin) for _ in range(3)
+        ])
+        paginator = EstimatedCountPaginator(
+            Post.objects.filter(text=POST_TEXT), 10
+        )
+        self.assertEqual(paginator.count, 2)
+        paginator = EstimatedCountPaginator(
+            Post.objects.filter(group=self.groups[0]), 10
+        )
+        self.assertEqual(paginator.count, 1)
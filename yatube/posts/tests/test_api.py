@@ -0,0 +1,181 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+GROUP_SLUG = 'test-slug'
+POST_AUTHOR_USERNAME = 'TestPostAuthor'
+USER_USERNAME = 'TestName'
+POST_TEXT = 'Тестовый текст'
+COMMENT_TEXT = 'Текст комментария'
+POSTS_COUNT = 12
+COMMENTS_COUNT = 3
+PAGE_SIZE = 5
+API_INDEX_URL = reverse('api:index')
+API_GROUP_URL = reverse('api:group_list', kwargs={'slug': GROUP_SLUG})
+API_PROFILE_URL = reverse(
+    'api:profile', kwargs={'username': POST_AUTHOR_USERNAME}
+)
+API_FOLLOW_URL = reverse('api:follow_index')
+INDEX_URL = reverse('posts:index')
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=POST_AUTHOR_USERNAME)
+        cls.user = User.objects.create_user(username=USER_USERNAME)
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug=GROUP_SLUG,
+            description='Тестовое описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'{POST_TEXT} {i}', author=cls.author, group=cls.group
+            )
+            for i in range(POSTS_COUNT)
+        ][::-1]
+        cls.post = cls.posts[0]
+        for i in range(COMMENTS_COUNT):
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f'{COMMENT_TEXT} {i}'
+            )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.post_url = reverse(
+            'api:post_detail', kwargs={'post_id': cls.post.pk}
+        )
+        cls.comments_url = reverse(
+            'api:post_comments', kwargs={'post_id': cls.post.pk}
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_feeds_return_posts(self):
+        """Ленты отдают посты в порядке публикации"""
+        ids = [post.pk for post in self.posts[:PAGE_SIZE]]
+        for url, client in (
+            (API_INDEX_URL, self.guest_client),
+            (API_GROUP_URL, self.guest_client),
+            (API_PROFILE_URL, self.guest_client),
+            (API_FOLLOW_URL, self.authorized_client),
+        ):
+            with self.subTest(url=url):
+                data = client.get(url, {'limit': PAGE_SIZE}).json()
+                self.assertEqual(
+                    [post['id'] for post in data['results']], ids
+                )
+                self.assertEqual(
+                    set(data['results'][0]),
+                    {'id', 'text', 'pub_date', 'author', 'group', 'image'}
+                )
+                self.assertEqual(data['results'][0]['author'],
+                                 POST_AUTHOR_USERNAME)
+                self.assertEqual(data['results'][0]['group'], GROUP_SLUG)
+
+    def test_cursor_pagination(self):
+        """Токены next и previous листают ленту без пропусков"""
+        seen = []
+        params = {'limit': PAGE_SIZE, 'fields': 'id'}
+        data = self.guest_client.get(API_INDEX_URL, params).json()
+        seen += data['results']
+        while data['next']:
+            data = self.guest_client.get(
+                API_INDEX_URL, {**params, 'after': data['next']}
+            ).json()
+            seen += data['results']
+        self.assertEqual(seen, [{'id': post.pk} for post in self.posts])
+        previous = self.guest_client.get(
+            API_INDEX_URL, {**params, 'before': data['previous']}
+        ).json()
+        self.assertEqual(
+            previous['results'],
+            [{'id': post.pk} for post in self.posts[PAGE_SIZE:PAGE_SIZE * 2]]
+        )
+
+    def test_sparse_fieldsets(self):
+        """?fields= оставляет только запрошенные поля и колонки"""
+        with self.assertNumQueries(1):
+            data = self.guest_client.get(
+                API_INDEX_URL, {'fields': 'id,text'}
+            ).json()
+        self.assertEqual(set(data['results'][0]), {'id', 'text'})
+        response = self.guest_client.get(API_INDEX_URL, {'fields': 'secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('secret', response.json()['detail'])
+
+    def test_id_field_reads_no_relations(self):
+        """?fields=id не присоединяет связанные таблицы"""
+        for url in (API_INDEX_URL, self.post_url, self.comments_url):
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as context:
+                    self.guest_client.get(url, {'fields': 'id'})
+                sql = context.captured_queries[-1]['sql']
+                self.assertNotIn('JOIN', sql)
+                self.assertNotIn('password', sql)
+
+    def test_dates_are_read_with_the_row(self):
+        """Даты читаются вместе с записью, без отложенной загрузки"""
+        for url, field in (
+            (API_INDEX_URL, 'pub_date'),
+            (self.post_url, 'pub_date'),
+            (self.comments_url, 'created'),
+        ):
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as context:
+                    self.guest_client.get(url, {'fields': f'id,{field}'})
+                with CaptureQueriesContext(connection) as expected:
+                    self.guest_client.get(url, {'fields': 'id'})
+                self.assertEqual(
+                    len(context.captured_queries),
+                    len(expected.captured_queries)
+                )
+
+    def test_post_detail_and_comments(self):
+        """Пост и его комментарии отдаются отдельными запросами"""
+        data = self.guest_client.get(self.post_url).json()
+        self.assertEqual(data['text'], self.post.text)
+        data = self.guest_client.get(
+            self.comments_url, {'fields': 'author,text'}
+        ).json()
+        self.assertEqual(
+            data['results'],
+            [
+                {'author': USER_USERNAME, 'text': f'{COMMENT_TEXT} {i}'}
+                for i in range(COMMENTS_COUNT)
+            ]
+        )
+        self.assertIsNone(data['next'])
+
+    def test_errors_are_json(self):
+        """Ошибки API отдаются в JSON"""
+        cases = (
+            (self.guest_client, API_FOLLOW_URL, 401),
+            (self.guest_client, reverse(
+                'api:post_detail', kwargs={'post_id': 0}
+            ), 404),
+            (self.guest_client, reverse(
+                'api:group_list', kwargs={'slug': 'missing'}
+            ), 404),
+        )
+        for client, url, status in cases:
+            with self.subTest(url=url):
+                response = client.get(url)
+                self.assertEqual(response.status_code, status)
+                self.assertIn('detail', response.json())
+        response = self.guest_client.post(API_INDEX_URL)
+        self.assertEqual(response.status_code, 405)
+
+    def test_payload_is_smaller_than_html(self):
+        """Лента в JSON в разы меньше HTML-страницы"""
+        html = self.guest_client.get(INDEX_URL).content
+        payload = self.guest_client.get(API_INDEX_URL).content
+        self.assertLess(len(payload) * 3, len(html))
@@ -0,0 +1,79 @@
+import json
+import shutil
+import tempfile
+from collections import Counter
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from .. import benchmark
+from ..models import Comment, Follow, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+USERS = 30
+POSTS = 200
+COMMENTS = 100
+VIEWS = ('index', 'group_posts', 'profile', 'post_detail', 'follow_index')
+API_VIEWS = tuple(f'api_{name}' for name in VIEWS) + ('api_post_comments',)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class BenchmarkTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cache.clear()
+        call_command(
+            'seed_data',
+            '--users', str(USERS),
+            '--posts', str(POSTS),
+            '--comments', str(COMMENTS),
+            '--images', '2',
+            '--follows', '5',
+            stdout=StringIO(),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_seed_creates_skewed_dataset(self):
+        """Данные созданы, посты распределены по авторам с перекосом"""
+        self.assertEqual(User.objects.count(), USERS)
+        self.assertEqual(Post.objects.count(), POSTS)
+        self.assertEqual(Comment.objects.count(), COMMENTS)
+        self.assertTrue(Follow.objects.exists())
+        self.assertTrue(Post.objects.exclude(image='').exists())
+        posts = Counter(Post.objects.values_list('author', flat=True))
+        top = posts.most_common(1)[0][1]
+        self.assertGreater(top, POSTS / USERS * 3)
+
+    def test_seed_is_reproducible(self):
+        """С тем же зерном создаются те же тексты"""
+        texts = list(Post.objects.order_by('pk').values_list('text')[:5])
+        Post.objects.all().delete()
+        User.objects.all().delete()
+        benchmark.seed(USERS, 5, 0, images=2, random_seed=0)
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list('text')), texts
+        )
+
+    def test_benchmark_reports_all_views(self):
+        """Замер выводит JSON с метриками HTML-лент и JSON API"""
+        out = StringIO()
+        call_command('benchmark_feeds', '--repeat', '2', stdout=out)
+        result = json.loads(out.getvalue())
+        self.assertEqual(tuple(result['results']), VIEWS + API_VIEWS)
+        for name in VIEWS + API_VIEWS:
+            for mode in ('cold', 'warm'):
+                with self.subTest(view=name, mode=mode):
+                    metrics = result['results'][name][mode]
+                    self.assertGreater(metrics['p50_ms'], 0)
+                    self.assertGreater(metrics['peak_memory_kb'], 0)
+                    self.assertIn('queries', metrics)
+                    self.assertGreater(metrics['bytes'], 0)
+        self.assertEqual(result['dataset']['posts'], POSTS)
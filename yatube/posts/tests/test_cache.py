@@ -0,0 +1,151 @@
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from .. import caching, signals
+from ..models import Comment, Follow, Group, Post, User
+
+FIRST_AUTHOR_USERNAME = 'TestFirstAuthor'
+SECOND_AUTHOR_USERNAME = 'TestSecondAuthor'
+FIRST_USER_USERNAME = 'TestFirstUser'
+SECOND_USER_USERNAME = 'TestSecondUser'
+FIRST_POST_TEXT = 'Пост первого автора'
+SECOND_POST_TEXT = 'Пост второго автора'
+NEW_POST_TEXT = 'Новый пост'
+COMMENT_TEXT = 'Текст комментария'
+GROUP_SLUG = 'test-slug'
+NEW_GROUP_SLUG = 'new-slug'
+FOLLOW_INDEX_URL = reverse('posts:follow_index')
+INDEX_URL = reverse('posts:index')
+
+
+class FollowPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.first_author = User.objects.create_user(
+            username=FIRST_AUTHOR_USERNAME
+        )
+        cls.second_author = User.objects.create_user(
+            username=SECOND_AUTHOR_USERNAME
+        )
+        cls.first_user = User.objects.create_user(
+            username=FIRST_USER_USERNAME
+        )
+        cls.second_user = User.objects.create_user(
+            username=SECOND_USER_USERNAME
+        )
+        Post.objects.create(text=FIRST_POST_TEXT, author=cls.first_author)
+        Post.objects.create(text=SECOND_POST_TEXT, author=cls.second_author)
+        Follow.objects.create(user=cls.first_user, author=cls.first_author)
+        Follow.objects.create(user=cls.second_user, author=cls.second_author)
+
+    def setUp(self):
+        cache.clear()
+        self.first_client = Client()
+        self.first_client.force_login(self.first_user)
+        self.second_client = Client()
+        self.second_client.force_login(self.second_user)
+
+    def test_follow_cache_varies_by_user(self):
+        """Каждый пользователь получает из кэша свою ленту"""
+        first = self.first_client.get(FOLLOW_INDEX_URL).content.decode()
+        second = self.second_client.get(FOLLOW_INDEX_URL).content.decode()
+        self.assertIn(FIRST_POST_TEXT, first)
+        self.assertNotIn(SECOND_POST_TEXT, first)
+        self.assertIn(SECOND_POST_TEXT, second)
+        self.assertNotIn(FIRST_POST_TEXT, second)
+
+    def test_follow_cache_is_used(self):
+        """Лента подписок берется из кэша, пока она не изменилась"""
+        self.first_client.get(FOLLOW_INDEX_URL)
+        Post.objects.filter(author=self.first_author).update(
+            text=NEW_POST_TEXT, excerpt_html=NEW_POST_TEXT
+        )
+        response = self.first_client.get(FOLLOW_INDEX_URL)
+        self.assertIn(FIRST_POST_TEXT, response.content.decode())
+
+    def test_follow_cache_invalidated_by_new_post(self):
+        """Новый пост автора сразу виден в ленте подписчика"""
+        self.first_client.get(FOLLOW_INDEX_URL)
+        Post.objects.create(text=NEW_POST_TEXT, author=self.first_author)
+        response = self.first_client.get(FOLLOW_INDEX_URL)
+        self.assertIn(NEW_POST_TEXT, response.content.decode())
+
+    def test_follow_count_updated_by_new_post(self):
+        """Новый пост автора сразу учитывается в числе постов ленты"""
+        for limit in (1000, 0):
+            with self.subTest(fanout_limit=limit):
+                with override_settings(FOLLOW_FEED_FANOUT_LIMIT=limit):
+                    response = self.first_client.get(FOLLOW_INDEX_URL)
+                    count = response.context['page_obj'].paginator.count
+                    Post.objects.create(
+                        text=NEW_POST_TEXT, author=self.first_author
+                    )
+                    response = self.first_client.get(FOLLOW_INDEX_URL)
+                    self.assertEqual(
+                        response.context['page_obj'].paginator.count,
+                        count + 1
+                    )
+
+    def test_follow_cache_invalidated_by_subscription(self):
+        """Подписка и отписка сразу меняют ленту"""
+        self.first_client.get(FOLLOW_INDEX_URL)
+        follow = Follow.objects.create(
+            user=self.first_user, author=self.second_author
+        )
+        response = self.first_client.get(FOLLOW_INDEX_URL)
+        self.assertIn(SECOND_POST_TEXT, response.content.decode())
+        follow.delete()
+        response = self.first_client.get(FOLLOW_INDEX_URL)
+        self.assertNotIn(SECOND_POST_TEXT, response.content.decode())
+
+
+class GenerationCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=FIRST_AUTHOR_USERNAME)
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug=GROUP_SLUG,
+            description='Тестовое описание'
+        )
+        cls.post = Post.objects.create(
+            text=FIRST_POST_TEXT, author=cls.author, group=cls.group
+        )
+        cls.post_detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': cls.post.pk}
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_post_detail_cache_invalidated_by_comment(self):
+        """Новый комментарий сразу виден на странице поста"""
+        self.guest_client.get(self.post_detail_url)
+        Comment.objects.create(
+            post=self.post, author=self.author, text=COMMENT_TEXT
+        )
+        response = self.guest_client.get(self.post_detail_url)
+        self.assertIn(COMMENT_TEXT, response.content.decode())
+
+    def test_lists_invalidated_by_group_change(self):
+        """Изменение группы сбрасывает ссылки на нее в лентах"""
+        self.guest_client.get(INDEX_URL)
+        self.group.slug = NEW_GROUP_SLUG
+        self.group.save()
+        response = self.guest_client.get(INDEX_URL)
+        self.assertIn(
+            reverse('posts:group_list', kwargs={'slug': NEW_GROUP_SLUG}),
+            response.content.decode()
+        )
+
+    def test_migrate_resets_generations_only(self):
+        """После миграций меняются версии, остальной кэш остается"""
+        cache.set(COMMENT_TEXT, 1)
+        index_version = caching.version('index')
+        signals.reset_generations()
+        self.assertNotEqual(caching.version('index'), index_version)
+        self.assertEqual(cache.get(COMMENT_TEXT), 1)
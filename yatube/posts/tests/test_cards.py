@@ -0,0 +1,116 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from .. import cards
+from ..models import Group, Post, User
+
+GROUP_SLUG = 'test-slug'
+POST_AUTHOR_USERNAME = 'TestPostAuthor'
+POST_TEXT = 'Тестовый текст'
+NEW_POST_TEXT = 'Исправленный текст'
+POSTS_COUNT = 3
+IMAGE_NAME = 'posts/missing.png'
+INDEX_URL = reverse('posts:index')
+GROUP_LIST_URL = reverse('posts:group_list', kwargs={'slug': GROUP_SLUG})
+PROFILE_URL = reverse(
+    'posts:profile', kwargs={'username': POST_AUTHOR_USERNAME}
+)
+
+
+class PostCardTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=POST_AUTHOR_USERNAME)
+        cls.user = User.objects.create_user(username='TestName')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug=GROUP_SLUG,
+            description='Тестовое описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'{POST_TEXT} {i}', author=cls.author, group=cls.group
+            )
+            for i in range(POSTS_COUNT)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def rendered(self, url):
+        """Карточки, нарисованные при открытии страницы."""
+        with mock.patch.object(
+            cards, 'render_to_string', wraps=cards.render_to_string
+        ) as render:
+            self.client.get(url)
+        return [call[0][1]['post'].pk for call in render.call_args_list]
+
+    def test_cards_are_shared_between_feeds(self):
+        """Карточки, нарисованные для одной ленты, берутся другими"""
+        self.assertEqual(len(self.rendered(INDEX_URL)), POSTS_COUNT)
+        self.assertEqual(self.rendered(GROUP_LIST_URL), [])
+        self.assertEqual(self.rendered(PROFILE_URL), [])
+
+    def test_edit_invalidates_only_own_card(self):
+        """Правка поста сбрасывает только его карточку"""
+        self.rendered(INDEX_URL)
+        post = self.posts[0]
+        post.text = NEW_POST_TEXT
+        post.save()
+        self.assertEqual(self.rendered(PROFILE_URL), [post.pk])
+        self.assertContains(self.client.get(INDEX_URL), NEW_POST_TEXT)
+
+    def test_author_change_invalidates_cards(self):
+        """Новое имя автора сразу видно в карточках"""
+        self.rendered(INDEX_URL)
+        self.author.first_name = 'Новое'
+        self.author.last_name = 'Имя'
+        self.author.save()
+        self.assertEqual(len(self.rendered(INDEX_URL)), POSTS_COUNT)
+        self.assertContains(self.client.get(INDEX_URL), 'Новое Имя')
+
+    def test_cards_keep_page_order(self):
+        """Карточки выводятся в порядке постов страницы"""
+        self.rendered(INDEX_URL)
+        posts = list(Post.objects.for_feed())
+        html = cards.render_cards(posts)
+        for post, card in zip(posts, html):
+            with self.subTest(post=post.pk):
+                self.assertIn(post.excerpt_html, card)
+
+    def test_placeholder_cards_expire_soon(self):
+        """Карточка с заглушкой хранится недолго, остальные - долго"""
+        Post.objects.filter(pk=self.posts[0].pk).update(image=IMAGE_NAME)
+        with mock.patch.object(
+            cards.cache, 'set_many', wraps=cards.cache.set_many
+        ) as set_many:
+            cards.render_cards(Post.objects.for_feed())
+        timeouts = {
+            call[0][1]: sorted(call[0][0]) for call in set_many.call_args_list
+            if any(key.startswith('card:') for key in call[0][0])
+        }
+        self.assertEqual(
+            len(timeouts[settings.CARD_PLACEHOLDER_TIMEOUT]), 1
+        )
+        self.assertEqual(
+            len(timeouts[settings.CARD_CACHE_TIMEOUT]), POSTS_COUNT - 1
+        )
+
+    def test_missing_cards_are_rendered_once(self):
+        """Недостающие карточки рисуются под блокировкой single-flight"""
+        with mock.patch.object(
+            cards, 'get_or_compute', wraps=cards.get_or_compute
+        ) as get_or_compute:
+            self.rendered(INDEX_URL)
+            self.rendered(INDEX_URL)
+        get_or_compute.assert_called_once()
+        self.assertTrue(
+            get_or_compute.call_args[0][0].startswith('cards:')
+        )
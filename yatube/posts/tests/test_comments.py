@@ -0,0 +1,76 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from ..models import Comment, Post, User
+
+POST_AUTHOR_USERNAME = 'TestPostAuthor'
+COMMENT_AUTHOR_USERNAME = 'TestCommentAuthor'
+POST_TEXT = 'Тестовый текст'
+COMMENT_TEXT = 'Комментарий'
+COMMENTS_COUNT = settings.COUNT_PAGE_COMMENTS + 5
+
+
+class CommentPagesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=POST_AUTHOR_USERNAME)
+        cls.post = Post.objects.create(text=POST_TEXT, author=cls.author)
+        Comment.objects.bulk_create([
+            Comment(
+                post=cls.post,
+                author=User.objects.create_user(
+                    username=f'{COMMENT_AUTHOR_USERNAME}{i}'
+                ),
+                text=f'{COMMENT_TEXT} {i}'
+            )
+            for i in range(COMMENTS_COUNT)
+        ])
+        cls.comments = list(cls.post.comments.order_by('created', 'pk'))
+        cls.post_detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': cls.post.pk}
+        )
+        cls.post_comments_url = reverse(
+            'posts:post_comments', kwargs={'post_id': cls.post.pk}
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_post_detail_shows_first_page(self):
+        """На странице поста выводится первая порция комментариев"""
+        response = self.guest_client.get(self.post_detail_url)
+        comments = response.context['comments']
+        self.assertEqual(
+            list(comments), self.comments[:settings.COUNT_PAGE_COMMENTS]
+        )
+        self.assertContains(response, self.post_comments_url)
+
+    def test_comments_endpoint_returns_next_page(self):
+        """Следующая порция комментариев отдается фрагментом страницы"""
+        first = self.guest_client.get(self.post_detail_url)
+        response = self.guest_client.get(
+            self.post_comments_url,
+            {'after': first.context['comments'].next_cursor}
+        )
+        self.assertTemplateUsed(response, 'posts/comments.html')
+        self.assertEqual(
+            list(response.context['comments']),
+            self.comments[settings.COUNT_PAGE_COMMENTS:]
+        )
+        self.assertNotContains(response, self.post_comments_url)
+
+    def test_comment_authors_loaded_in_one_query(self):
+        """Авторы комментариев загружаются вместе с комментариями"""
+        with self.assertNumQueries(2):
+            self.guest_client.get(self.post_comments_url)
+
+    def test_comments_of_missing_post(self):
+        """Для несуществующего поста возвращается 404"""
+        response = self.guest_client.get(
+            reverse('posts:post_comments', kwargs={'post_id': 0})
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,139 @@
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+GROUP_SLUG = 'test-slug'
+POST_AUTHOR_USERNAME = 'TestPostAuthor'
+USER_USERNAME = 'TestName'
+POST_TEXT = 'Тестовый текст'
+INDEX_URL = reverse('posts:index')
+GROUP_LIST_URL = reverse('posts:group_list', kwargs={'slug': GROUP_SLUG})
+PROFILE_URL = reverse(
+    'posts:profile', kwargs={'username': POST_AUTHOR_USERNAME}
+)
+FOLLOW_INDEX_URL = reverse('posts:follow_index')
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=POST_AUTHOR_USERNAME)
+        cls.user = User.objects.create_user(username=USER_USERNAME)
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug=GROUP_SLUG,
+            description='Тестовое описание'
+        )
+        cls.post = Post.objects.create(
+            text=POST_TEXT, author=cls.author, group=cls.group
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.post_detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': cls.post.pk}
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def revalidate(self, client, url):
+        etag = client.get(url)['ETag']
+        return client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_pages_return_304(self):
+        """Неизмененные страницы отвечают 304"""
+        for client, url in (
+            (self.guest_client, INDEX_URL),
+            (self.guest_client, GROUP_LIST_URL),
+            (self.guest_client, PROFILE_URL),
+            (self.guest_client, self.post_detail_url),
+            (self.authorized_client, PROFILE_URL),
+            (self.authorized_client, FOLLOW_INDEX_URL),
+        ):
+            with self.subTest(url=url):
+                response = self.revalidate(client, url)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+
+    def test_304_skips_queries(self):
+        """Для 304 ленте не нужна база, посту - один поиск по ключу"""
+        etag = self.guest_client.get(INDEX_URL)['ETag']
+        with self.assertNumQueries(0):
+            self.guest_client.get(INDEX_URL, HTTP_IF_NONE_MATCH=etag)
+        etag = self.guest_client.get(self.post_detail_url)['ETag']
+        with self.assertNumQueries(1):
+            self.guest_client.get(
+                self.post_detail_url, HTTP_IF_NONE_MATCH=etag
+            )
+
+    def test_changes_invalidate_etag(self):
+        """Новые данные меняют ETag страниц"""
+        changes = (
+            (INDEX_URL, lambda: Post.objects.create(
+                text=POST_TEXT, author=self.author
+            )),
+            (self.post_detail_url, lambda: Comment.objects.create(
+                post=self.post, author=self.user, text=POST_TEXT
+            )),
+            (GROUP_LIST_URL, lambda: self.group.save()),
+        )
+        for url, change in changes:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                change()
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_new_user_keeps_etags(self):
+        """Регистрация пользователя не меняет ETag чужих страниц"""
+        for url in (INDEX_URL, GROUP_LIST_URL, self.post_detail_url):
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                User.objects.create_user(username=f'new-{len(url)}')
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 304)
+
+    def test_author_change_invalidates_etag(self):
+        """Новое имя автора со страницы меняет ее ETag"""
+        for url in (INDEX_URL, PROFILE_URL, self.post_detail_url):
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                self.author.first_name = url
+                self.author.save()
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_user(self):
+        """Анонимы и пользователи получают разные ETag"""
+        guest_etag = self.guest_client.get(INDEX_URL)['ETag']
+        response = self.authorized_client.get(
+            INDEX_URL, HTTP_IF_NONE_MATCH=guest_etag
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_cache_control(self):
+        """Ответы анонимам общие, пользователям - только для браузера"""
+        response = self.guest_client.get(INDEX_URL)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('must-revalidate', response['Cache-Control'])
+        response = self.authorized_client.get(INDEX_URL)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertIn('Cookie', response['Vary'])
+
+    def test_missing_objects_return_404(self):
+        response = self.guest_client.get(
+            reverse('posts:group_list', kwargs={'slug': 'missing'})
+        )
+        self.assertEqual(response.status_code, 404)
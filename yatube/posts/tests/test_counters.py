@@ -0,0 +1,65 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from ..models import AuthorStats, Comment, Follow, Post, User
+
+USER_USERNAME = 'TestName'
+POST_AUTHOR_USERNAME = 'TestPostAuthor'
+POST_TEXT = 'Тестовый текст'
+COMMENT_TEXT = 'Комментарий'
+PROFILE_URL = reverse(
+    'posts:profile', kwargs={'username': POST_AUTHOR_USERNAME}
+)
+
+
+class AuthorStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=POST_AUTHOR_USERNAME)
+        cls.user = User.objects.create_user(username=USER_USERNAME)
+
+    def assertStats(self, user, **expected):
+        stats = AuthorStats.objects.get(user=user)
+        for name, value in expected.items():
+            with self.subTest(user=user.username, counter=name):
+                self.assertEqual(getattr(stats, name), value)
+
+    def test_counters_follow_signals(self):
+        """Счетчики меняются при создании и удалении объектов"""
+        post = Post.objects.create(text=POST_TEXT, author=self.author)
+        comment = Comment.objects.create(
+            post=post, author=self.user, text=COMMENT_TEXT
+        )
+        follow = Follow.objects.create(user=self.user, author=self.author)
+        self.assertStats(self.author, posts_count=1, followers_count=1)
+        self.assertStats(self.user, comments_count=1, following_count=1)
+        comment.delete()
+        follow.delete()
+        post.delete()
+        self.assertStats(
+            self.author, posts_count=0, comments_count=0, followers_count=0
+        )
+        self.assertStats(self.user, comments_count=0, following_count=0)
+
+    def test_recount_repairs_counters(self):
+        """Команда recount_stats исправляет разошедшиеся счетчики"""
+        Post.objects.bulk_create([
+            Post(text=POST_TEXT, author=self.author) for _ in range(3)
+        ])
+        AuthorStats.objects.filter(user=self.user).delete()
+        out = StringIO()
+        call_command('recount_stats', stdout=out)
+        self.assertIn('2', out.getvalue())
+        self.assertStats(self.author, posts_count=3)
+        self.assertStats(self.user, posts_count=0)
+
+    def test_profile_uses_counter(self):
+        """Профиль выводит число постов из счетчика"""
+        Post.objects.create(text=POST_TEXT, author=self.author)
+        AuthorStats.objects.filter(user=self.author).update(posts_count=7)
+        response = Client().get(PROFILE_URL)
+        self.assertEqual(response.context['count'], 7)
@@ -0,0 +1,134 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import feed
+from ..models import FeedEntry, Follow, Post, User
+
+USER_USERNAME = 'TestName'
+SECOND_USER_USERNAME = 'TestSecondName'
+POST_AUTHOR_USERNAME = 'TestPostAuthor'
+POST_TEXT = 'Тестовый текст'
+FOLLOW_INDEX_URL = reverse('posts:follow_index')
+
+
+class FollowFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=POST_AUTHOR_USERNAME)
+        cls.user = User.objects.create_user(username=USER_USERNAME)
+        Post.objects.bulk_create([
+            Post(text=f'{POST_TEXT} {i}', author=cls.author)
+            for i in range(3)
+        ])
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_follow_backfills_feed(self):
+        """Подписка добавляет в ленту уже опубликованные посты автора"""
+        Follow.objects.create(user=self.user, author=self.author)
+        self.assertEqual(
+            FeedEntry.objects.filter(user=self.user).count(),
+            self.author.posts.count()
+        )
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост попадает в ленты подписчиков"""
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text=POST_TEXT, author=self.author)
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.user, post=post).exists()
+        )
+        response = self.authorized_client.get(FOLLOW_INDEX_URL)
+        self.assertIn(post, response.context['page_obj'])
+
+    def test_unfollow_prunes_feed(self):
+        """Отписка убирает посты автора из ленты"""
+        follow = Follow.objects.create(user=self.user, author=self.author)
+        follow.delete()
+        self.assertFalse(FeedEntry.objects.filter(user=self.user).exists())
+        response = self.authorized_client.get(FOLLOW_INDEX_URL)
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+    @override_settings(FOLLOW_FEED_FANOUT_LIMIT=0)
+    def test_celebrity_posts_are_read_on_the_fly(self):
+        """Посты автора-знаменитости не раскладываются, но видны в ленте"""
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text=POST_TEXT, author=self.author)
+        self.assertFalse(FeedEntry.objects.filter(user=self.user).exists())
+        response = self.authorized_client.get(FOLLOW_INDEX_URL)
+        self.assertIn(post, response.context['page_obj'])
+        self.assertEqual(
+            len(response.context['page_obj']),
+            self.author.posts.count()
+        )
+
+    @override_settings(FOLLOW_FEED_FANOUT_LIMIT=1)
+    def test_unfollow_below_limit_defers_backfill(self):
+        """Автор, переставший быть знаменитостью, читается на лету, пока
+        ленты не дозаполнит rebuild_follow_feed --pending"""
+        second_user = User.objects.create_user(username=SECOND_USER_USERNAME)
+        follow = Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.create(user=second_user, author=self.author)
+        follow.delete()
+        self.assertFalse(FeedEntry.objects.filter(user=second_user).exists())
+        self.assertTrue(feed.is_celebrity(self.author.pk))
+        client = Client()
+        client.force_login(second_user)
+        response = client.get(FOLLOW_INDEX_URL)
+        self.assertEqual(
+            len(response.context['page_obj']), self.author.posts.count()
+        )
+        call_command('rebuild_follow_feed', pending=True, stdout=StringIO())
+        self.assertEqual(
+            FeedEntry.objects.filter(user=second_user).count(),
+            self.author.posts.count()
+        )
+        self.assertFalse(feed.is_celebrity(self.author.pk))
+
+    @override_settings(FOLLOW_FEED_BACKFILL_LIMIT=2)
+    def test_backfill_takes_recent_posts(self):
+        """Подписка и пересборка добавляют только последние посты автора"""
+        recent = set(
+            self.author.posts.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True
+            )[:2]
+        )
+        Follow.objects.create(user=self.user, author=self.author)
+        entries = FeedEntry.objects.filter(user=self.user)
+        self.assertEqual(set(entries.values_list('post', flat=True)), recent)
+        feed.rebuild()
+        self.assertEqual(set(entries.values_list('post', flat=True)), recent)
+
+    def test_celebrity_check_reads_counters(self):
+        """Знаменитости ищутся по счетчикам, а не подсчетом подписок"""
+        Follow.objects.create(user=self.user, author=self.author)
+        with CaptureQueriesContext(connection) as context:
+            list(feed.celebrity_authors(self.user))
+            feed.is_celebrity(self.author.pk)
+        for query in context.captured_queries:
+            with self.subTest(sql=query['sql']):
+                self.assertNotIn('COUNT', query['sql'])
+                self.assertIn('posts_authorstats', query['sql'])
+
+    @override_settings(FOLLOW_FEED_FANOUT_LIMIT=1)
+    def test_rebuild_fills_feeds_except_celebrities(self):
+        """Пересборка заполняет ленты, кроме постов знаменитостей"""
+        celebrity = User.objects.create_user(username=SECOND_USER_USERNAME)
+        Post.objects.create(text=POST_TEXT, author=celebrity)
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.create(user=self.user, author=celebrity)
+        Follow.objects.create(user=self.author, author=celebrity)
+        FeedEntry.objects.all().delete()
+        feed.rebuild()
+        self.assertEqual(
+            set(FeedEntry.objects.values_list('user', 'post')),
+            {(self.user.pk, post.pk) for post in self.author.posts.all()}
+        )
@@ -1,10 +1,12 @@
 import shutil
 import tempfile
+from io import BytesIO
 
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase, Client, override_settings
 from django.urls import reverse
+from PIL import Image
 
 from ..models import Post, Group, User
 
@@ -36,6 +38,12 @@ GROUP_SLUG = 'test-slug'
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
+def make_image(name, image_format, size=(10, 10)):
+    file = BytesIO()
+    Image.new('RGB', size).save(file, image_format)
+    return SimpleUploadedFile(name, file.getvalue())
+
+
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class PostCreateFormTests(TestCase):
     @classmethod
@@ -113,3 +121,51 @@ class PostCreateFormTests(TestCase):
         )
         self.assertEqual(posts_count, Post.objects.count())
         self.assertTrue(Post.objects.get(text='Измененный текст'))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageUploadLimitsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USER_USERNAME)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def assertRejected(self, image, error):
+        response = self.authorized_client.post(
+            reverse(POST_CREATE_URL),
+            data={'text': POST_TEXT, 'image': image}
+        )
+        self.assertFormError(response, 'form', 'image', error)
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(POST_IMAGE_MAX_SIZE=100)
+    def test_large_file_rejected_while_uploading(self):
+        """Слишком большой файл отбрасывается во время загрузки"""
+        self.assertRejected(
+            make_image('large.png', 'png', (100, 100)),
+            'Размер файла не должен превышать 100\xa0байт'
+        )
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=99)
+    def test_image_with_too_many_pixels_rejected(self):
+        """Картинка с большим числом пикселей отклоняется"""
+        self.assertRejected(
+            make_image('wide.png', 'png'),
+            'Картинка 10x10 слишком велика'
+        )
+
+    def test_unsupported_format_rejected(self):
+        """Картинка в неподдерживаемом формате отклоняется"""
+        self.assertRejected(
+            make_image('image.bmp', 'bmp'),
+            'Допустимые форматы: JPEG, PNG, GIF, WEBP'
+        )
@@ -0,0 +1,100 @@
+import re
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+GROUP_SLUG = 'test-slug'
+USER_USERNAME = 'TestName'
+POST_AUTHOR_USERNAME = 'TestPostAuthor'
+POST_TEXT = 'Тестовый текст'
+COMMENT_TEXT = 'Комментарий'
+POSTS_COUNT = 15
+INDEX_URL = reverse('posts:index')
+GROUP_LIST_URL = reverse('posts:group_list', kwargs={'slug': GROUP_SLUG})
+PROFILE_URL = reverse(
+    'posts:profile', kwargs={'username': POST_AUTHOR_USERNAME}
+)
+FOLLOW_INDEX_URL = reverse('posts:follow_index')
+# Полный проход по таблице (без индекса) и сортировка во временном дереве.
+# Проход по подзапросу (CO-ROUTINE) полным проходом по таблице не считается.
+FULL_SCAN = re.compile(r'\bSCAN (TABLE )?(?P<table>\w+)( AS \w+)?$')
+SUBQUERY = re.compile(r'^(CO-ROUTINE|MATERIALIZE) (\d+ )?(?P<name>\w+)')
+TEMP_SORT = 'TEMP B-TREE'
+
+
+class FeedIndexesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USER_USERNAME)
+        cls.author = User.objects.create_user(username=POST_AUTHOR_USERNAME)
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug=GROUP_SLUG,
+            description='Тестовое описание'
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        for i in range(POSTS_COUNT):
+            post = Post.objects.create(
+                text=f'{POST_TEXT} {i}', author=cls.author, group=cls.group
+            )
+            Comment.objects.create(
+                post=post, author=cls.user, text=COMMENT_TEXT
+            )
+        cls.post_comments_url = reverse(
+            'posts:post_comments', kwargs={'post_id': post.pk}
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def feed_queries(self, url):
+        """Запросы к таблицам постов при выводе первой и второй страниц."""
+        with CaptureQueriesContext(connection) as context:
+            for params in ({}, {'page': 2}, {'after': ''}):
+                response = self.client.get(url, params)
+            page_obj = response.context.get('page_obj')
+            if page_obj is not None:
+                self.client.get(url, {'after': page_obj.next_cursor})
+                self.client.get(url, {'before': page_obj.next_cursor})
+        return [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT') and 'posts_' in query['sql']
+        ]
+
+    def full_scans(self, plan):
+        subqueries = {
+            match.group('name') for match in map(SUBQUERY.search, plan)
+            if match
+        }
+        return [
+            step for step, match in zip(plan, map(FULL_SCAN.search, plan))
+            if match and match.group('table') not in subqueries
+        ]
+
+    def test_feed_queries_use_indexes(self):
+        """Запросы лент идут по индексам без полного прохода и сортировки"""
+        urls = (
+            INDEX_URL,
+            GROUP_LIST_URL,
+            PROFILE_URL,
+            FOLLOW_INDEX_URL,
+            self.post_comments_url,
+        )
+        with connection.cursor() as cursor:
+            for url in urls:
+                for sql in self.feed_queries(url):
+                    cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                    plan = [row[-1] for row in cursor.fetchall()]
+                    with self.subTest(url=url, sql=sql, plan=plan):
+                        self.assertEqual(self.full_scans(plan), [])
+                        self.assertFalse(
+                            any(TEMP_SORT in step for step in plan)
+                        )
@@ -0,0 +1,96 @@
+from importlib import import_module
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from .. import caching, markup
+from ..models import Comment, Post, User
+
+POST_AUTHOR_USERNAME = 'TestPostAuthor'
+UNSAFE_TEXT = '<script>alert(1)</script>\nВторая строка'
+LONG_TEXT = 'Начало ' + 'слово ' * 100 + 'ХВОСТ'
+EXCERPT_LENGTH = 50
+INDEX_URL = reverse('posts:index')
+MIGRATION = 'posts.migrations.0016_rendered_text'
+MIGRATION_EXCERPT_LENGTH = 300
+CACHED_KEY = 'picture:test'
+
+
+@override_settings(POST_EXCERPT_LENGTH=EXCERPT_LENGTH)
+class MarkupTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=POST_AUTHOR_USERNAME)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_html_is_rendered_on_save(self):
+        """HTML поста и комментария строится при сохранении и экранируется"""
+        post = Post.objects.create(text=UNSAFE_TEXT, author=self.author)
+        comment = Comment.objects.create(
+            post=post, author=self.author, text=UNSAFE_TEXT
+        )
+        for html in (post.text_html, post.excerpt_html, comment.text_html):
+            with self.subTest(html=html):
+                self.assertNotIn('<script>', html)
+                self.assertIn('&lt;script&gt;', html)
+                self.assertIn('<br>', html)
+
+    def test_edit_rerenders_html(self):
+        """Правка поста строит HTML заново"""
+        post = Post.objects.create(text=UNSAFE_TEXT, author=self.author)
+        post.text = LONG_TEXT
+        post.save()
+        self.assertIn('ХВОСТ', post.text_html)
+
+    def test_feeds_show_excerpt(self):
+        """Лента выводит начало длинного поста, страница поста - весь"""
+        post = Post.objects.create(text=LONG_TEXT, author=self.author)
+        self.assertLess(len(post.excerpt_html), EXCERPT_LENGTH + 20)
+        response = self.guest_client.get(INDEX_URL)
+        self.assertContains(response, 'Начало')
+        self.assertNotContains(response, 'ХВОСТ')
+        response = self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        )
+        self.assertContains(response, 'ХВОСТ')
+
+    def test_render_texts_backfills(self):
+        """render_texts заполняет HTML у записей без него"""
+        post = Post.objects.create(text=LONG_TEXT, author=self.author)
+        Comment.objects.create(post=post, author=self.author, text=LONG_TEXT)
+        Post.objects.update(text_html='', excerpt_html='')
+        Comment.objects.update(text_html='')
+        call_command('render_texts', batch_size=1, stdout=StringIO())
+        post.refresh_from_db()
+        self.assertIn('ХВОСТ', post.text_html)
+        self.assertIn('Начало', post.excerpt_html)
+        self.assertTrue(Comment.objects.get().text_html)
+
+    @override_settings(POST_EXCERPT_LENGTH=MIGRATION_EXCERPT_LENGTH)
+    def test_migration_keeps_own_renderer(self):
+        """Миграция 0016 строит HTML своей копией разметки"""
+        migration = import_module(MIGRATION)
+        self.assertFalse(hasattr(migration, 'markup'))
+        self.assertEqual(
+            migration.post_html(LONG_TEXT), markup.post_html(LONG_TEXT)
+        )
+        self.assertEqual(
+            migration.comment_html(UNSAFE_TEXT),
+            markup.comment_html(UNSAFE_TEXT)
+        )
+
+    def test_render_texts_keeps_cache(self):
+        """render_texts сбрасывает фрагменты, а не весь кэш"""
+        Post.objects.create(text=UNSAFE_TEXT, author=self.author)
+        cache.set(CACHED_KEY, 1)
+        version = caching.version()
+        call_command('render_texts', stdout=StringIO())
+        self.assertEqual(cache.get(CACHED_KEY), 1)
+        self.assertNotEqual(caching.version(), version)
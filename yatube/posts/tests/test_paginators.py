@@ -0,0 +1,125 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from ..models import Group, Post, User
+from ..paginators import CountedPaginator, CursorPaginator, encode_cursor
+
+GROUP_SLUG = 'test-slug'
+POST_AUTHOR_USERNAME = 'TestPostAuthor'
+POST_TEXT = 'Тестовый текст'
+POSTS_COUNT = 16
+INDEX_URL = reverse('posts:index')
+GROUP_LIST_URL = reverse('posts:group_list', kwargs={'slug': GROUP_SLUG})
+PROFILE_URL = reverse(
+    'posts:profile', kwargs={'username': POST_AUTHOR_USERNAME}
+)
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=POST_AUTHOR_USERNAME)
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug=GROUP_SLUG,
+            description='Тестовое описание'
+        )
+        Post.objects.bulk_create([
+            Post(text=f'{POST_TEXT} {i}', author=cls.author, group=cls.group)
+            for i in range(POSTS_COUNT)
+        ])
+        cls.posts = list(Post.objects.order_by('-pub_date', '-pk'))
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.paginator = CursorPaginator(
+            Post.objects.all(), settings.COUNT_PAGE_POSTS
+        )
+
+    def test_pages_follow_each_other(self):
+        """Страницы по ключу идут подряд без пропусков и повторов"""
+        first = self.paginator.get_page()
+        second = self.paginator.get_page(after=first.next_cursor)
+        self.assertEqual(
+            list(first) + list(second),
+            self.posts
+        )
+        self.assertFalse(first.has_previous())
+        self.assertTrue(second.has_previous())
+        self.assertFalse(second.has_next())
+
+    def test_previous_page(self):
+        """Токен before возвращает предыдущую страницу"""
+        first = self.paginator.get_page()
+        second = self.paginator.get_page(after=first.next_cursor)
+        previous = self.paginator.get_page(before=second.previous_cursor)
+        self.assertEqual(list(previous), list(first))
+        self.assertFalse(previous.has_previous())
+
+    def test_broken_cursor_returns_first_page(self):
+        """Испорченный токен возвращает первую страницу"""
+        for token in ('broken', encode_cursor(['not a date', 1])):
+            with self.subTest(token=token):
+                page = self.paginator.get_page(after=token)
+                self.assertEqual(
+                    list(page),
+                    self.posts[:settings.COUNT_PAGE_POSTS]
+                )
+
+    def test_views_accept_cursor(self):
+        """Ленты поддерживают постраничный вывод по ключу"""
+        for url in (INDEX_URL, GROUP_LIST_URL, PROFILE_URL):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url, {'after': ''})
+                page_obj = response.context['page_obj']
+                self.assertTrue(page_obj.is_cursor)
+                response = self.guest_client.get(
+                    url, {'after': page_obj.next_cursor}
+                )
+                self.assertEqual(
+                    list(response.context['page_obj']),
+                    self.posts[settings.COUNT_PAGE_POSTS:]
+                )
+
+
+class CountedPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=POST_AUTHOR_USERNAME)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_page_window(self):
+        """Выводится окно страниц вокруг текущей, первая и последняя"""
+        paginator = CountedPaginator(range(1000), 10)
+        windows = (
+            (1, [1, 2, 3, 4, 5, 6, None, 100]),
+            (50, [1, None, *range(45, 56), None, 100]),
+            (97, [1, None, *range(92, 101)]),
+        )
+        for number, expected in windows:
+            with self.subTest(number=number):
+                self.assertEqual(paginator.page_window(number), expected)
+
+    def test_count_is_cached_and_maintained(self):
+        """Число постов берется из кэша и обновляется сигналами"""
+        Post.objects.create(text=POST_TEXT, author=self.author)
+        CountedPaginator(Post.objects.all(), 10, 'index').count
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                CountedPaginator(Post.objects.all(), 10, 'index').count, 1
+            )
+        post = Post.objects.create(text=POST_TEXT, author=self.author)
+        self.assertEqual(
+            CountedPaginator(Post.objects.all(), 10, 'index').count, 2
+        )
+        post.delete()
+        self.assertEqual(
+            CountedPaginator(Post.objects.all(), 10, 'index').count, 1
+        )
@@ -0,0 +1,58 @@
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from ..models import Follow, Group, Post, User
+
+GROUP_SLUG = 'test-slug'
+USER_USERNAME = 'TestName'
+POST_AUTHOR_USERNAME = 'TestPostAuthor'
+POST_TEXT = 'Тестовый текст'
+POSTS_COUNT = 10
+INDEX_URL = reverse('posts:index')
+GROUP_LIST_URL = reverse('posts:group_list', kwargs={'slug': GROUP_SLUG})
+PROFILE_URL = reverse(
+    'posts:profile', kwargs={'username': POST_AUTHOR_USERNAME}
+)
+FOLLOW_INDEX_URL = reverse('posts:follow_index')
+
+
+class FeedQueriesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USER_USERNAME)
+        cls.author = User.objects.create_user(username=POST_AUTHOR_USERNAME)
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug=GROUP_SLUG,
+            description='Тестовое описание'
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_feed_queries_do_not_depend_on_posts(self):
+        """Число запросов ленты не зависит от числа постов на странице"""
+        for i in range(POSTS_COUNT):
+            Post.objects.create(
+                text=f'{POST_TEXT} {i}', author=self.author, group=self.group
+            )
+        pages = (
+            (self.guest_client, INDEX_URL, 2),
+            (self.guest_client, GROUP_LIST_URL, 3),
+            (self.guest_client, PROFILE_URL, 4),
+            (self.authorized_client, FOLLOW_INDEX_URL, 6),
+        )
+        for client, url, queries in pages:
+            with self.subTest(url=url):
+                cache.clear()
+                with self.assertNumQueries(queries):
+                    response = client.get(url)
+                self.assertEqual(
+                    len(response.context['page_obj']), POSTS_COUNT
+                )
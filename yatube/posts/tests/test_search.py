@@ -0,0 +1,149 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import search
+from ..models import Comment, Post, User
+
+POST_AUTHOR_USERNAME = 'TestPostAuthor'
+SEARCH_URL = reverse('posts:post_search')
+PER_PAGE = 3
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=POST_AUTHOR_USERNAME)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def found(self, query):
+        return list(search.search_page(query, PER_PAGE))
+
+    def test_index_follows_signals(self):
+        """Индекс обновляется при изменении и удалении постов"""
+        post = Post.objects.create(text='Первый снег', author=self.author)
+        self.assertEqual(self.found('снег'), [post])
+        post.text = 'Весенний дождь'
+        post.save()
+        self.assertEqual(self.found('снег'), [])
+        self.assertEqual(self.found('ДОЖДЬ'), [post])
+        post.delete()
+        self.assertEqual(self.found('дождь'), [])
+
+    def test_comments_lead_to_post(self):
+        """Пост находится по тексту комментария к нему"""
+        post = Post.objects.create(text='Без ключевых', author=self.author)
+        comment = Comment.objects.create(
+            post=post, author=self.author, text='Отличный закат'
+        )
+        self.assertEqual(self.found('закат'), [post])
+        comment.delete()
+        self.assertEqual(self.found('закат'), [])
+
+    def test_all_terms_required_and_ranked(self):
+        """Находятся посты со всеми словами, более релевантные выше"""
+        rare = Post.objects.create(
+            text='кот ' + 'слово ' * 20, author=self.author
+        )
+        frequent = Post.objects.create(text='кот кот пес', author=self.author)
+        Post.objects.create(text='только пес', author=self.author)
+        self.assertEqual(self.found('кот'), [frequent, rare])
+        self.assertEqual(self.found('кот пес'), [frequent])
+        self.assertEqual(self.found('"кот*" (-'), [frequent, rare])
+
+    def test_keyset_pages(self):
+        """Страницы результатов идут подряд без пропусков и повторов"""
+        posts = [
+            Post.objects.create(text=f'лето {i}', author=self.author)
+            for i in range(PER_PAGE * 2 + 1)
+        ]
+        first = search.search_page('лето', PER_PAGE)
+        second = search.search_page('лето', PER_PAGE, after=first.next_cursor)
+        third = search.search_page('лето', PER_PAGE, after=second.next_cursor)
+        self.assertEqual(
+            list(first) + list(second) + list(third), posts[::-1]
+        )
+        self.assertFalse(third.has_next())
+        previous = search.search_page(
+            'лето', PER_PAGE, before=second.previous_cursor
+        )
+        self.assertEqual(list(previous), list(first))
+        broken = search.search_page('лето', PER_PAGE, after='broken')
+        self.assertEqual(list(broken), list(first))
+
+    def test_pages_merge_posts_and_comments(self):
+        """Пост выдается один раз по лучшей оценке текста и комментариев"""
+        posts = [
+            Post.objects.create(
+                text='зима ' + 'слово ' * i, author=self.author
+            )
+            for i in range(PER_PAGE * 3)
+        ]
+        for i, post in enumerate(posts[::2]):
+            Comment.objects.bulk_create([
+                Comment(post=post, author=self.author, text=text)
+                for text in ('зима зима', 'зима ' + 'слово ' * i, 'зима')
+            ])
+        call_command('rebuild_search_index', stdout=StringIO())
+        backend = search.get_backend()
+        scores = backend._best_scores(
+            '"зима"', [post.pk for post in posts]
+        )
+        expected = sorted(posts, key=lambda post: (scores[post.pk], -post.pk))
+        pages = [search.search_page('зима', PER_PAGE)]
+        while pages[-1].has_next():
+            pages.append(search.search_page(
+                'зима', PER_PAGE, after=pages[-1].next_cursor
+            ))
+        self.assertEqual(
+            [post for page in pages for post in page], expected
+        )
+        previous = search.search_page(
+            'зима', PER_PAGE, before=pages[-1].previous_cursor
+        )
+        self.assertEqual(list(previous), list(pages[-2]))
+        with CaptureQueriesContext(connection) as queries:
+            search.search_page('зима', PER_PAGE)
+        scans = [
+            query['sql'] for query in queries
+            if 'MATCH' in query['sql'] and 'ORDER BY' in query['sql']
+        ]
+        self.assertTrue(scans)
+        for sql in scans:
+            with self.subTest(sql=sql):
+                self.assertEqual(sql.count('LIMIT'), 3)
+
+    def test_rebuild_command(self):
+        """Команда rebuild_search_index индексирует посты без сигналов"""
+        Post.objects.bulk_create([
+            Post(text='осень', author=self.author) for _ in range(2)
+        ])
+        self.assertEqual(self.found('осень'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(len(self.found('осень')), 2)
+
+    @override_settings(SEARCH_BACKEND='posts.search.DatabaseBackend')
+    def test_database_backend(self):
+        """Запасной поиск через LIKE находит посты и комментарии"""
+        post = Post.objects.create(text='Горное озеро', author=self.author)
+        other = Post.objects.create(text='Море', author=self.author)
+        Comment.objects.create(post=other, author=self.author, text='озеро')
+        self.assertEqual(self.found('озеро'), [other, post])
+
+    def test_search_page(self):
+        """Страница поиска выводит найденные посты"""
+        Post.objects.create(text='Северное сияние', author=self.author)
+        response = self.guest_client.get(SEARCH_URL, {'q': 'сияние'})
+        self.assertTemplateUsed(response, 'posts/search.html')
+        self.assertContains(response, 'Северное сияние')
+        response = self.guest_client.get(SEARCH_URL)
+        self.assertIsNone(response.context['page_obj'])
@@ -0,0 +1,120 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from .. import thumbnails
+from ..models import Post, ReleasedImage, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+POST_AUTHOR_USERNAME = 'TestPostAuthor'
+POST_TEXT = 'Тестовый текст'
+SWEEP_LIMIT = 10
+
+
+def image_content(color=(255, 0, 0)):
+    file = BytesIO()
+    Image.new('RGB', (40, 20), color).save(file, 'png')
+    return file.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=POST_AUTHOR_USERNAME)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.storage = Post.image.field.storage
+
+    def create_post(self, content, name='image.PNG'):
+        return Post.objects.create(
+            text=POST_TEXT,
+            author=self.author,
+            image=SimpleUploadedFile(name, content)
+        )
+
+    def test_file_named_by_content_hash(self):
+        """Файл называется хэшем содержимого и лежит в подкаталогах"""
+        content = image_content()
+        digest = hashlib.sha256(content).hexdigest()
+        post = self.create_post(content)
+        self.assertEqual(
+            post.image.name,
+            f'posts/{digest[:2]}/{digest[2:4]}/{digest}.png'
+        )
+        self.assertTrue(self.storage.exists(post.image.name))
+
+    def test_identical_uploads_share_file_and_variants(self):
+        """Одинаковые загрузки используют один файл и одни варианты"""
+        content = image_content()
+        first = self.create_post(content, 'first.png')
+        thumbnails.generate(first.image.name)
+        second = self.create_post(content, 'second.png')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(
+            len(self.storage.listdir(
+                self.storage.path(first.image.name).rsplit('/', 1)[0]
+            )[1]),
+            1
+        )
+        second.refresh_from_db()
+        self.assertNotEqual(second.image_variants, '')
+
+    @override_settings(POST_IMAGE_RELEASE_DELAY=0)
+    def test_file_removed_with_last_reference(self):
+        """Файл удаляется только вместе с последним ссылающимся постом"""
+        content = image_content()
+        first = self.create_post(content)
+        second = self.create_post(content)
+        name = first.image.name
+        first.delete()
+        thumbnails.sweep(SWEEP_LIMIT)
+        self.assertTrue(self.storage.exists(name))
+        second.delete()
+        thumbnails.sweep(SWEEP_LIMIT)
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(ReleasedImage.objects.exists())
+        self.assertFalse(
+            os.path.exists(os.path.dirname(os.path.dirname(
+                self.storage.path(name)
+            )))
+        )
+
+    def test_recent_upload_keeps_file(self):
+        """Файл, который недавно загрузили снова, не удаляется"""
+        post = self.create_post(image_content())
+        name = post.image.name
+        post.delete()
+        ReleasedImage.objects.update(
+            released=timezone.now() - timedelta(
+                seconds=settings.POST_IMAGE_RELEASE_DELAY + 1
+            )
+        )
+        # Загрузка того же содержимого, пост которой еще не сохранен.
+        self.storage.save('image.png', ContentFile(image_content()))
+        thumbnails.sweep(SWEEP_LIMIT)
+        self.assertTrue(self.storage.exists(name))
+        self.assertTrue(ReleasedImage.objects.exists())
+        expired = time.time() - settings.POST_IMAGE_RELEASE_DELAY - 1
+        os.utime(self.storage.path(name), (expired, expired))
+        thumbnails.sweep(SWEEP_LIMIT)
+        self.assertFalse(self.storage.exists(name))
@@ -0,0 +1,196 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+
+from .. import thumbnails
+from ..models import Post, ThumbnailJob, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+POST_AUTHOR_USERNAME = 'TestPostAuthor'
+POST_TEXT = 'Тестовый текст'
+PLACEHOLDER = 'img/placeholder.svg'
+INDEX_URL = reverse('posts:index')
+
+
+def make_image(name='image.png', size=(1200, 600)):
+    file = BytesIO()
+    Image.new('RGB', size, (255, 0, 0)).save(file, 'png')
+    return SimpleUploadedFile(name, file.getvalue(), 'image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailPipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=POST_AUTHOR_USERNAME)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_saving_image_schedules_thumbnails(self):
+        """Сохранение картинки ставит создание вариантов в очередь"""
+        post = Post.objects.create(
+            text=POST_TEXT, author=self.author, image=make_image()
+        )
+        post.text = POST_TEXT * 2
+        post.save()
+        self.assertEqual(
+            list(ThumbnailJob.objects.values_list('image', flat=True)),
+            [post.image.name]
+        )
+
+    @override_settings(THUMBNAIL_WORKERS=1)
+    def test_worker_processes_queue(self):
+        """Команда thumbnail_worker разбирает очередь и сохраняет варианты"""
+        post = Post.objects.create(
+            text=POST_TEXT, author=self.author, image=make_image()
+        )
+        call_command('thumbnail_worker', once=True, stdout=StringIO())
+        post.refresh_from_db()
+        self.assertFalse(ThumbnailJob.objects.exists())
+        self.assertTrue(post.image_variants)
+
+    @override_settings(THUMBNAIL_WORKERS=1, THUMBNAIL_MAX_ATTEMPTS=2)
+    def test_failing_image_is_not_requeued(self):
+        """Неудачная задача не ставится в очередь со страниц"""
+        post = Post.objects.create(
+            text=POST_TEXT, author=self.author, image=make_image()
+        )
+        with mock.patch.object(
+            thumbnails, 'generate', side_effect=OSError
+        ) as generate:
+            call_command('thumbnail_worker', once=True, stdout=StringIO())
+        self.assertEqual(generate.call_count, 2)
+        job = ThumbnailJob.objects.get()
+        self.assertEqual((job.attempts, job.failed), (2, True))
+        with mock.patch.object(thumbnails, 'schedule') as schedule:
+            response = self.guest_client.get(INDEX_URL)
+        schedule.assert_not_called()
+        self.assertContains(response, PLACEHOLDER)
+        call_command(
+            'thumbnail_worker', once=True, retry_failed=True,
+            stdout=StringIO()
+        )
+        post.refresh_from_db()
+        self.assertTrue(post.image_variants)
+        self.assertFalse(ThumbnailJob.objects.exists())
+
+    def test_reads_requeue_only_lost_images(self):
+        """Чтение ставит в очередь только картинку без задачи и редко"""
+        post = Post.objects.create(
+            text=POST_TEXT, author=self.author, image=make_image()
+        )
+        with CaptureQueriesContext(connection) as context:
+            thumbnails.resolve([post])
+        self.assertFalse([
+            query for query in context.captured_queries
+            if query['sql'].startswith('INSERT')
+        ])
+        ThumbnailJob.objects.all().delete()
+        cache.clear()
+        thumbnails.resolve([post])
+        self.assertTrue(ThumbnailJob.objects.filter(image=post.image.name))
+        ThumbnailJob.objects.all().delete()
+        with self.assertNumQueries(0):
+            thumbnails.resolve([post])
+
+    def test_placeholder_until_thumbnail_is_ready(self):
+        """Пока вариантов нет, выводится заглушка; шаблон не сжимает"""
+        post = Post.objects.create(
+            text=POST_TEXT, author=self.author, image=make_image()
+        )
+        with mock.patch.object(thumbnails, 'get_thumbnail') as get_thumbnail:
+            response = self.guest_client.get(INDEX_URL)
+        get_thumbnail.assert_not_called()
+        self.assertContains(response, PLACEHOLDER)
+        thumbnails.generate(post.image.name)
+        response = self.guest_client.get(INDEX_URL)
+        self.assertNotContains(response, PLACEHOLDER)
+        self.assertContains(response, '<picture>')
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, 'width="960"')
+
+    def test_variants_are_not_upscaled(self):
+        """Для каждого формата создаются ширины не больше оригинала"""
+        post = Post.objects.create(
+            text=POST_TEXT, author=self.author, image=make_image()
+        )
+        thumbnails.generate(post.image.name)
+        post.refresh_from_db()
+        thumbnails.resolve([post])
+        picture = post.picture
+        for srcset in (picture['srcset'], picture['sources'][0]['srcset']):
+            with self.subTest(srcset=srcset):
+                self.assertEqual(
+                    [item.split()[-1] for item in srcset.split(', ')],
+                    ['320w', '640w', '960w', '1200w']
+                )
+        self.assertIn('.webp', picture['sources'][0]['srcset'])
+        self.assertIn('.jpg', picture['src'])
+
+    def test_variants_are_stored_on_post(self):
+        """Варианты хранятся в строке поста и не требуют обращений к кэшу"""
+        posts = [
+            Post.objects.create(
+                text=POST_TEXT, author=self.author, image=make_image()
+            )
+            for _ in range(3)
+        ]
+        for post in posts:
+            thumbnails.generate(post.image.name)
+        cache.clear()
+        with mock.patch.object(
+            thumbnails.cache, 'get_many', wraps=thumbnails.cache.get_many
+        ) as get_many:
+            response = self.guest_client.get(INDEX_URL)
+        self.assertFalse([
+            key for call in get_many.call_args_list for key in call[0][0]
+            if key.startswith('picture:')
+        ])
+        self.assertContains(response, '<picture>', count=len(posts))
+
+    def test_missing_variants_resolved_in_one_lookup(self):
+        """Посты без сохраненных вариантов ищутся в кэше одним get_many"""
+        posts = [
+            Post.objects.create(
+                text=POST_TEXT, author=self.author, image=make_image()
+            )
+            for _ in range(3)
+        ]
+        for post in posts:
+            thumbnails.generate(post.image.name)
+        Post.objects.update(image_variants='')
+        with mock.patch.object(
+            thumbnails.cache, 'get_many', wraps=thumbnails.cache.get_many
+        ) as get_many:
+            thumbnails.resolve(Post.objects.all())
+        get_many.assert_called_once()
+
+    def test_new_image_resets_variants(self):
+        """Новая картинка сбрасывает варианты старой"""
+        post = Post.objects.create(
+            text=POST_TEXT, author=self.author, image=make_image()
+        )
+        thumbnails.generate(post.image.name)
+        post.refresh_from_db()
+        post.image = make_image('other.png')
+        post.save()
+        self.assertEqual(post.image_variants, '')
@@ -0,0 +1,177 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+
+from .. import caching, search
+from ..models import (
+    AuthorStats, Comment, FeedEntry, Follow, Group, Post, User
+)
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+AUTHOR_USERNAME = 'TestPostAuthor'
+USER_USERNAME = 'TestName'
+GROUP_SLUG = 'test-slug'
+POST_TEXT = 'Тестовый текст'
+COMMENT_TEXT = 'Текст комментария'
+POSTS_COUNT = 5
+
+
+class TransferTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create_user(username=AUTHOR_USERNAME)
+        user = User.objects.create_user(username=USER_USERNAME)
+        group = Group.objects.create(
+            title='Тестовый заголовок', slug=GROUP_SLUG, description='-'
+        )
+        for i in range(POSTS_COUNT):
+            post = Post.objects.create(
+                text=f'{POST_TEXT} {i}',
+                author=author,
+                group=group if i % 2 else None
+            )
+        Comment.objects.create(post=post, author=user, text=COMMENT_TEXT)
+        Follow.objects.create(user=user, author=author)
+        self.pub_dates = dict(Post.objects.values_list('pk', 'pub_date'))
+
+    def export(self, *args):
+        out = StringIO()
+        call_command('export_data', *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def write(self, name, data):
+        path = os.path.join(TEMP_DIR, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(data)
+        return path
+
+    def clear(self):
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        cache.clear()
+
+    def test_jsonl_round_trip(self):
+        """Выгрузка JSON Lines загружается обратно со связями и датами"""
+        path = os.path.join(TEMP_DIR, 'data.jsonl')
+        call_command(
+            'export_data', '--output', path, '--batch-size', '2',
+            stderr=StringIO()
+        )
+        with open(path, encoding='utf-8') as file:
+            lines = [json.loads(line) for line in file]
+        self.assertEqual(len(lines), 1 + POSTS_COUNT + 1 + 1)
+        self.clear()
+        call_command(
+            'import_data', path, '--batch-size', '2', stdout=StringIO()
+        )
+        self.assertEqual(
+            dict(Post.objects.values_list('pk', 'pub_date')), self.pub_dates
+        )
+        self.assertEqual(
+            Post.objects.filter(group__slug=GROUP_SLUG).count(),
+            POSTS_COUNT // 2
+        )
+        self.assertTrue(Follow.objects.filter(
+            user__username=USER_USERNAME, author__username=AUTHOR_USERNAME
+        ).exists())
+        self.assertEqual(Comment.objects.get().author.username, USER_USERNAME)
+
+    def test_import_refreshes_derived_data(self):
+        """После загрузки пересобираются счетчики, ленты и индекс"""
+        data = self.export()
+        self.clear()
+        call_command(
+            'import_data', self.write('data.jsonl', data), stdout=StringIO()
+        )
+        self.assertEqual(
+            AuthorStats.objects.get(
+                user__username=AUTHOR_USERNAME
+            ).posts_count,
+            POSTS_COUNT
+        )
+        self.assertEqual(FeedEntry.objects.count(), POSTS_COUNT)
+        self.assertEqual(
+            len(search.search_page(POST_TEXT, POSTS_COUNT)), POSTS_COUNT
+        )
+
+    def test_import_resets_sequences_and_keeps_cache(self):
+        """Загрузка сдвигает последовательности id, кэш не очищается"""
+        data = self.export()
+        self.clear()
+        cache.set(USER_USERNAME, 1)
+        index_version = caching.version('index')
+        with mock.patch.object(
+            connection.ops, 'sequence_reset_sql', return_value=[]
+        ) as sequence_reset_sql:
+            call_command(
+                'import_data', self.write('ids.jsonl', data),
+                stdout=StringIO()
+            )
+        self.assertEqual(
+            sequence_reset_sql.call_args[0][1], [Post, Comment]
+        )
+        self.assertEqual(cache.get(USER_USERNAME), 1)
+        self.assertNotEqual(caching.version('index'), index_version)
+
+    def test_import_is_repeatable(self):
+        """Повторная загрузка пропускает существующие записи"""
+        path = self.write('repeat.jsonl', self.export())
+        call_command('import_data', path, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), POSTS_COUNT)
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_csv_round_trip(self):
+        """Группы и посты выгружаются и загружаются в CSV"""
+        files = [
+            (name, self.export('--format', 'csv', '--models', name))
+            for name in ('groups', 'posts')
+        ]
+        self.clear()
+        for name, data in files:
+            call_command(
+                'import_data', self.write(f'{name}.csv', data),
+                '--format', 'csv', '--model', name,
+                stdout=StringIO()
+            )
+        self.assertEqual(
+            dict(Post.objects.values_list('pk', 'pub_date')), self.pub_dates
+        )
+        self.assertEqual(
+            Post.objects.filter(group__slug=GROUP_SLUG).count(),
+            POSTS_COUNT // 2
+        )
+
+    def test_csv_requires_one_model(self):
+        with self.assertRaises(CommandError):
+            self.export('--format', 'csv')
+
+    def test_unknown_group_is_reported(self):
+        """Пост с неизвестной группой останавливает загрузку"""
+        path = self.write('posts.jsonl', self.export('--models', 'posts'))
+        self.clear()
+        with self.assertRaisesMessage(CommandError, GROUP_SLUG):
+            call_command('import_data', path, stdout=StringIO())
+
+    def test_unknown_post_is_reported(self):
+        """Комментарий к несуществующему посту останавливает загрузку"""
+        path = self.write(
+            'comments.jsonl', self.export('--models', 'comments')
+        )
+        Post.objects.all().delete()
+        with self.assertRaisesMessage(CommandError, 'Нет постов'):
+            call_command('import_data', path, stdout=StringIO())
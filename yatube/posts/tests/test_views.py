@@ -69,6 +69,7 @@ class PostsPagesTests(TestCase):
         shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.user = User.objects.create_user(username=USER_USERNAME)
         self.authorized_client = Client()
@@ -108,13 +109,30 @@ class PostsPagesTests(TestCase):
             author=User.objects.get(username=POST_AUTHOR_USERNAME),
         )
         self.authorized_client.get(INDEX_URL)
-        Post.objects.get(text='ТестКэш').delete()
+        Post.objects.filter(pk=post.pk).update(
+            excerpt_html='<p>ТестБезСигналов</p>'
+        )
         response_1 = self.authorized_client.get(INDEX_URL)
         self.assertTrue(post.text in response_1.content.decode())
         cache.clear()
         response_2 = self.authorized_client.get(INDEX_URL)
         self.assertFalse(post.text in response_2.content.decode())
 
+    def test_index_page_cache_invalidated_by_signals(self):
+        """Кэш index сбрасывается при изменении постов"""
+        post = Post.objects.create(
+            text='ТестКэш',
+            author=User.objects.get(username=POST_AUTHOR_USERNAME),
+        )
+        self.authorized_client.get(INDEX_URL)
+        post.text = 'ТестИзмененныйКэш'
+        post.save()
+        response_1 = self.authorized_client.get(INDEX_URL)
+        self.assertTrue(post.text in response_1.content.decode())
+        post.delete()
+        response_2 = self.authorized_client.get(INDEX_URL)
+        self.assertFalse(post.text in response_2.content.decode())
+
     def test_group_list_page_show_correct_context(self):
         """Шаблон group_list сформирован с правильным контекстом"""
         response = self.authorized_client.get(GROUP_LIST_URL)
@@ -194,6 +212,7 @@ class PaginatorViewsTest(TestCase):
         ])
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.user = User.objects.create_user(username=USER_USERNAME)
         self.authorized_client = Client()
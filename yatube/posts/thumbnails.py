@@ -0,0 +1,263 @@
+import json
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from PIL import Image
+from sorl.thumbnail import delete, get_thumbnail
+
+from . import caching
+from .models import Post, ReleasedImage, ThumbnailJob
+
+PICTURE_KEY = 'picture:{}'
+# Значение PICTURE_KEY картинки, варианты которой создать не удалось.
+FAILED = False
+# Отметка, что чтение недавно проверяло задачу картинки.
+REQUEUE_KEY = 'picture:requeue:{}'
+MIME_TYPES = {
+    'JPEG': 'image/jpeg',
+    'PNG': 'image/png',
+    'WEBP': 'image/webp',
+}
+
+logger = logging.getLogger(__name__)
+
+
+def _source_width(name):
+    """Ширина оригинала по заголовку файла."""
+    with Post.image.field.storage.open(name) as file:
+        return Image.open(file).width
+
+
+def _variants(name, image_format, source_width):
+    """Варианты картинки одного формата по возрастанию ширины.
+
+    Картинка не увеличивается: ширины больше оригинала заменяются
+    одним вариантом в ширину оригинала.
+    """
+    ratio_width, ratio_height = settings.POST_IMAGE_RATIO
+    widths = sorted({
+        min(width, source_width) for width in settings.POST_IMAGE_WIDTHS
+    })
+    return [
+        get_thumbnail(
+            name,
+            f'{width}x{round(width * ratio_height / ratio_width)}',
+            crop='center',
+            upscale=False,
+            format=image_format,
+        )
+        for width in widths
+    ]
+
+
+def _srcset(variants):
+    return ', '.join(
+        f'{variant.url} {variant.width}w' for variant in variants
+    )
+
+
+def generate(name):
+    """Создает все варианты картинки и сбрасывает кэш ее постов."""
+    source_width = _source_width(name)
+    *source_formats, fallback_format = settings.POST_IMAGE_FORMATS
+    fallback = _variants(name, fallback_format, source_width)
+    default = next(
+        (
+            variant for variant in reversed(fallback)
+            if variant.width <= settings.POST_IMAGE_DEFAULT_WIDTH
+        ),
+        fallback[0]
+    )
+    picture = {
+        'src': default.url,
+        'width': default.width,
+        'height': default.height,
+        'srcset': _srcset(fallback),
+        'sources': [
+            {
+                'type': MIME_TYPES[image_format],
+                'srcset': _srcset(
+                    _variants(name, image_format, source_width)
+                ),
+            }
+            for image_format in source_formats
+        ],
+    }
+    cache.set(PICTURE_KEY.format(name), picture, None)
+    posts = Post.objects.filter(image=name)
+    posts.update(image_variants=json.dumps(picture))
+    posts = posts.values_list('pk', 'author_id', 'group_id')
+    for pk, author_id, group_id in posts:
+        scopes = [f'post:{pk}', 'index', f'author:{author_id}']
+        if group_id is not None:
+            scopes.append(f'group:{group_id}')
+        caching.bump(*scopes)
+
+
+def process(job):
+    """Создает варианты картинки из очереди.
+
+    Ошибка записывается в лог, а задача возвращается в конец очереди;
+    после THUMBNAIL_MAX_ATTEMPTS попыток она помечается неудачной.
+    """
+    try:
+        generate(job.image)
+    except Exception:
+        logger.exception('Не удалось создать варианты картинки %s', job.image)
+        attempts = job.attempts + 1
+        failed = attempts >= settings.THUMBNAIL_MAX_ATTEMPTS
+        ThumbnailJob.objects.update_or_create(
+            image=job.image,
+            defaults={'attempts': attempts, 'failed': failed},
+        )
+        if failed:
+            cache.set(PICTURE_KEY.format(job.image), FAILED, None)
+
+
+def schedule(*names):
+    """Ставит картинки в очередь на создание вариантов.
+
+    Очередь хранится в базе и пополняется в той же транзакции, что и
+    пост; ее разбирает команда thumbnail_worker. Неудачные задачи
+    остаются в очереди, поэтому картинка не ставится в нее повторно.
+    """
+    ThumbnailJob.objects.bulk_create(
+        [ThumbnailJob(image=name) for name in names],
+        ignore_conflicts=True,
+    )
+
+
+def claim(limit):
+    """Забирает из очереди до limit задач."""
+    jobs = []
+    for job in ThumbnailJob.objects.filter(failed=False).order_by('pk')[
+        :limit
+    ]:
+        deleted, _ = ThumbnailJob.objects.filter(pk=job.pk).delete()
+        if deleted:
+            jobs.append(job)
+    return jobs
+
+
+def retry_failed():
+    """Возвращает неудачные задачи в очередь; возвращает их число."""
+    names = list(
+        ThumbnailJob.objects.filter(failed=True).values_list(
+            'image', flat=True
+        )
+    )
+    ThumbnailJob.objects.filter(image__in=names).update(
+        attempts=0, failed=False
+    )
+    cache.delete_many([PICTURE_KEY.format(name) for name in names])
+    return len(names)
+
+
+def release(name):
+    """Отмечает картинку, на которую перестал ссылаться пост.
+
+    Одинаковые картинки хранятся одним файлом, и его имя может получить
+    загрузка, пост которой еще не сохранен. Поэтому файл удаляет sweep.
+    """
+    ReleasedImage.objects.update_or_create(
+        image=name, defaults={'released': timezone.now()}
+    )
+
+
+def _collect(name):
+    storage = Post.image.field.storage
+    try:
+        removed = storage.delete_unused(
+            name,
+            settings.POST_IMAGE_RELEASE_DELAY,
+            Post.objects.filter(image=name).exists,
+        )
+    except Exception:
+        logger.exception('Не удалось удалить картинку %s', name)
+        return
+    if removed:
+        ThumbnailJob.objects.filter(image=name).delete()
+        try:
+            delete(name, delete_file=False)
+        except Exception:
+            logger.exception('Не удалось удалить варианты картинки %s', name)
+        cache.delete(PICTURE_KEY.format(name))
+    if removed or Post.objects.filter(image=name).exists():
+        ReleasedImage.objects.filter(image=name).delete()
+
+
+def sweep(limit):
+    """Удаляет до limit освобожденных картинок вместе с вариантами.
+
+    Файл удаляется, только если за POST_IMAGE_RELEASE_DELAY секунд на
+    него не сослался пост и его не загружали снова; ссылки проверяются
+    заново в момент удаления.
+    """
+    released_before = timezone.now() - timedelta(
+        seconds=settings.POST_IMAGE_RELEASE_DELAY
+    )
+    names = list(
+        ReleasedImage.objects.filter(
+            released__lt=released_before
+        ).order_by('released').values_list('image', flat=True)[:limit]
+    )
+    for name in names:
+        _collect(name)
+    return len(names)
+
+
+def prepare(post):
+    """Берет варианты у поста с той же картинкой или ставит их в очередь."""
+    name = post.image.name
+    variants = Post.objects.filter(image=name).exclude(
+        image_variants=''
+    ).values_list('image_variants', flat=True).first()
+    if variants is None:
+        schedule(name)
+        return
+    Post.objects.filter(pk=post.pk).update(image_variants=variants)
+    post.image_variants = variants
+
+
+def resolve(posts):
+    """Проставляет постам post.picture - готовые варианты картинки или None.
+
+    Варианты хранятся в строке поста; для постов без них варианты
+    ищутся в кэше одним get_many. В очередь картинку ставит сохранение
+    поста, а чтение - только если ее задачи нет, не чаще раза в
+    THUMBNAIL_REQUEUE_INTERVAL секунд. Картинки, варианты которых
+    создать не удалось, в очередь не ставятся.
+    """
+    missing = {}
+    for post in posts:
+        post.picture = None
+        if post.image_variants:
+            post.picture = json.loads(post.image_variants)
+        elif post.image:
+            missing.setdefault(post.image.name, []).append(post)
+    if not missing:
+        return
+    found = cache.get_many([PICTURE_KEY.format(name) for name in missing])
+    unresolved = []
+    for name, image_posts in missing.items():
+        picture = found.get(PICTURE_KEY.format(name))
+        if picture is None:
+            unresolved.append(name)
+        for post in image_posts:
+            post.picture = picture or None
+    unresolved = [
+        name for name in unresolved
+        if cache.add(
+            REQUEUE_KEY.format(name), 1, settings.THUMBNAIL_REQUEUE_INTERVAL
+        )
+    ]
+    if unresolved:
+        queued = ThumbnailJob.objects.filter(
+            image__in=unresolved
+        ).values_list('image', flat=True)
+        lost = set(unresolved) - set(queued)
+        if lost:
+            schedule(*lost)
@@ -0,0 +1,250 @@
+from contextlib import contextmanager
+from itertools import groupby, islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from . import caching, counters, feed, markup, search, thumbnails
+from .models import Comment, Follow, Group, Post, User
+
+# Модели в порядке зависимостей и поля их записей. Посты и комментарии
+# переносятся со своими id, остальные связи - по username и slug.
+FIELDS = {
+    'groups': ('slug', 'title', 'description'),
+    'posts': ('id', 'author', 'group', 'text', 'pub_date', 'image'),
+    'comments': ('id', 'post', 'author', 'text', 'created'),
+    'follows': ('user', 'author'),
+}
+EXPORT_COLUMNS = {
+    'groups': (Group, ('slug', 'title', 'description')),
+    'posts': (Post, (
+        'pk', 'author__username', 'group__slug', 'text', 'pub_date', 'image'
+    )),
+    'comments': (Comment, (
+        'pk', 'post_id', 'author__username', 'text', 'created'
+    )),
+    'follows': (Follow, ('user__username', 'author__username')),
+}
+
+
+def _value(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def export(name, batch_size):
+    """Записи модели по возрастанию первичного ключа.
+
+    Строки читаются порциями по ключу, поэтому память не зависит от
+    размера таблицы, а глубокие порции не замедляются.
+    """
+    model, columns = EXPORT_COLUMNS[name]
+    rows = model.objects.order_by('pk').values_list('pk', *columns)
+    last = None
+    while True:
+        batch = rows if last is None else rows.filter(pk__gt=last)
+        batch = list(batch[:batch_size])
+        if not batch:
+            return
+        for pk, *values in batch:
+            yield dict(zip(FIELDS[name], map(_value, values)))
+        last = batch[-1][0]
+
+
+@contextmanager
+def _keep_dates():
+    """Отключает auto_now_add, чтобы сохранить даты из файла.
+
+    Меняет поля моделей в памяти процесса, поэтому подходит только для
+    команд управления.
+    """
+    fields = [
+        Post._meta.get_field('pub_date'),
+        Comment._meta.get_field('created'),
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _users(usernames):
+    """id пользователей по username; недостающие создаются без пароля."""
+    usernames = set(usernames)
+    found = dict(
+        User.objects.filter(username__in=usernames).values_list(
+            'username', 'pk'
+        )
+    )
+    missing = usernames - set(found)
+    if missing:
+        User.objects.bulk_create(
+            [
+                User(username=username, password=make_password(None))
+                for username in missing
+            ],
+            ignore_conflicts=True,
+        )
+        found.update(
+            User.objects.filter(username__in=missing).values_list(
+                'username', 'pk'
+            )
+        )
+    return found
+
+
+def _groups(slugs):
+    slugs = {slug for slug in slugs if slug}
+    found = dict(
+        Group.objects.filter(slug__in=slugs).values_list('slug', 'pk')
+    )
+    missing = slugs - set(found)
+    if missing:
+        raise ValueError(f'Нет групп: {", ".join(sorted(missing))}')
+    return found
+
+
+def _posts(ids):
+    # В CSV id приходят строками.
+    ids = {int(pk) for pk in ids}
+    found = set(Post.objects.filter(pk__in=ids).values_list('pk', flat=True))
+    missing = ids - found
+    if missing:
+        raise ValueError(
+            f'Нет постов: {", ".join(str(pk) for pk in sorted(missing))}'
+        )
+
+
+def _load_groups(records):
+    Group.objects.bulk_create(
+        [
+            Group(
+                slug=record['slug'],
+                title=record['title'],
+                description=record['description'],
+            )
+            for record in records
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def _load_posts(records):
+    users = _users(record['author'] for record in records)
+    groups = _groups(record['group'] for record in records)
+    Post.objects.bulk_create(
+        [
+            Post(
+                pk=record['id'],
+                author_id=users[record['author']],
+                group_id=groups.get(record['group']),
+                text=record['text'],
+                **markup.post_html(record['text']),
+                pub_date=parse_datetime(record['pub_date']),
+                image=record['image'] or '',
+            )
+            for record in records
+        ],
+        ignore_conflicts=True,
+    )
+    thumbnails.schedule(*{
+        record['image'] for record in records if record['image']
+    })
+
+
+def _load_comments(records):
+    users = _users(record['author'] for record in records)
+    _posts(record['post'] for record in records)
+    Comment.objects.bulk_create(
+        [
+            Comment(
+                pk=record['id'],
+                post_id=record['post'],
+                author_id=users[record['author']],
+                text=record['text'],
+                **markup.comment_html(record['text']),
+                created=parse_datetime(record['created']),
+            )
+            for record in records
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def _load_follows(records):
+    users = _users(
+        username
+        for record in records
+        for username in (record['user'], record['author'])
+    )
+    Follow.objects.bulk_create(
+        [
+            Follow(
+                user_id=users[record['user']],
+                author_id=users[record['author']],
+            )
+            for record in records
+            if record['user'] != record['author']
+        ],
+        ignore_conflicts=True,
+    )
+
+
+LOADERS = {
+    'groups': _load_groups,
+    'posts': _load_posts,
+    'comments': _load_comments,
+    'follows': _load_follows,
+}
+
+
+def load(records, batch_size):
+    """Загружает пары (модель, запись) порциями по batch_size.
+
+    Каждая порция - одна транзакция с bulk_create; уже существующие
+    записи пропускаются, поэтому прерванную загрузку можно повторить.
+    Сигналы не вызываются: счетчики, ленты и поисковый индекс нужно
+    пересобрать после загрузки. Возвращает число записей по моделям.
+    """
+    loaded = dict.fromkeys(FIELDS, 0)
+    with _keep_dates():
+        for name, group in groupby(records, key=lambda pair: pair[0]):
+            if name not in LOADERS:
+                raise ValueError(f'Неизвестная модель: {name}')
+            group = (record for _, record in group)
+            while True:
+                chunk = list(islice(group, batch_size))
+                if not chunk:
+                    break
+                with transaction.atomic():
+                    LOADERS[name](chunk)
+                loaded[name] += len(chunk)
+    _reset_sequences([
+        model for name, model in (('posts', Post), ('comments', Comment))
+        if loaded[name]
+    ])
+    return loaded
+
+
+def _reset_sequences(models):
+    """Сдвигает последовательности id за загруженные явные id.
+
+    Иначе на PostgreSQL следующий обычный INSERT получит занятый id.
+    """
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def refresh():
+    """Пересобирает данные, которые при загрузке не обновили сигналы."""
+    counters.recount()
+    feed.rebuild()
+    search.get_backend().rebuild()
+    # Все фрагменты, страницы и счетчики лент в кэше устаревают.
+    caching.bump(caching.ROOT_SCOPE)
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from django.template.defaultfilters import filesizeformat
+
+
+def upload_errors(request):
+    """Ошибки файлов, отброшенных во время загрузки: поле -> текст."""
+    if not hasattr(request, 'upload_errors'):
+        request.upload_errors = {}
+    return request.upload_errors
+
+
+class LimitedUploadHandler(FileUploadHandler):
+    """Отбрасывает файл, как только он превысил POST_IMAGE_MAX_SIZE.
+
+    Стоит первым в FILE_UPLOAD_HANDLERS: считает полученные части и
+    передает их дальше, не накапливая. Остаток отброшенного файла
+    вычитывается из запроса без записи.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.POST_IMAGE_MAX_SIZE:
+            upload_errors(self.request)[self.field_name] = (
+                f'Размер файла не должен превышать '
+                f'{filesizeformat(settings.POST_IMAGE_MAX_SIZE)}'
+            )
+            raise SkipFile()
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
@@ -1,17 +1,25 @@
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
-from django.core.paginator import Paginator
 from django.contrib.auth.decorators import login_required
-from django.conf import settings
 
-from .models import Group, Post, User, Comment, Follow
+from .models import Post, User, Comment, Follow
 from .forms import PostForm, CommentForm
-
-
+from . import counters, search
+from .caching import list_version, user_scopes, version
+from .conditional import (
+    conditional, follow_etag, get_author, get_follow_version, get_group,
+    get_post, group_etag, index_etag, post_etag, profile_etag, remember_users
+)
+from .feed import follow_feed
+from .paginators import CursorPaginator, paginate
+from .uploads import upload_errors
+
+
+@conditional(index_etag)
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, settings.COUNT_PAGE_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = Post.objects.for_feed()
+    page_obj = paginate(request, post_list, count_scope='index')
+    remember_users(request, [post.author_id for post in page_obj])
     context = {
         'page_obj': page_obj,
     }
@@ -20,7 +28,11 @@ def index(request):
 
 @login_required
 def post_create(request):
-    form = PostForm(request.POST or None, files=request.FILES or None)
+    form = PostForm(
+        request.POST or None,
+        files=request.FILES or None,
+        upload_errors=upload_errors(request)
+    )
 
     if request.method == 'POST' and form.is_valid():
         post = form.save(commit=False)
@@ -44,7 +56,8 @@ def post_edit(request, post_id):
         form = PostForm(
             request.POST or None,
             files=request.FILES or None,
-            instance=post
+            instance=post,
+            upload_errors=upload_errors(request)
         )
 
         if form.is_valid():
@@ -66,12 +79,12 @@ def post_edit(request, post_id):
     return render(request, 'posts/create_post.html', context)
 
 
+@conditional(group_etag)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    paginator = Paginator(post_list, settings.COUNT_PAGE_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    group = get_group(request, slug)
+    post_list = group.posts.for_feed()
+    page_obj = paginate(request, post_list, count_scope=f'group:{group.pk}')
+    remember_users(request, [post.author_id for post in page_obj])
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -79,17 +92,18 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@conditional(profile_etag)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_author(request, username)
     following = False
     if request.user.is_authenticated:
         if request.user.follower.filter(author=author).exists():
             following = True
-    author_posts = author.posts.all()
-    count_author_posts = author.posts.count()
-    paginator = Paginator(author_posts, settings.COUNT_PAGE_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    author_posts = author.posts.for_feed()
+    count_author_posts = counters.for_user(author).posts_count
+    page_obj = paginate(
+        request, author_posts, count_scope=f'author:{author.pk}'
+    )
     context = {
         'author': author,
         'count': count_author_posts,
@@ -99,20 +113,69 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+@conditional(post_etag)
 def post_detail(request, post_id):
     form = CommentForm()
-    post = get_object_or_404(Post, pk=post_id)
-    count_user_posts = Post.objects.filter(author=post.author).count()
-    comments = Comment.objects.filter(post=post)
+    post = get_post(request, post_id)
+    count_user_posts = counters.for_user(post.author).posts_count
+    comments = comment_page(post.pk)
+    commenters = [comment.author_id for comment in comments]
+    remember_users(request, commenters)
     context = {
         'post': post,
         'comments': comments,
         'count': count_user_posts,
-        'form': form
+        'form': form,
+        'cache_version': list_version(
+            f'post:{post.pk}', f'author:{post.author_id}',
+            f'user:{post.author_id}'
+        ),
+        'comments_version': version(
+            f'comments:{post.pk}', *user_scopes(commenters)
+        ),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def comment_page(post_id, after=None):
+    """Порция комментариев поста вместе с авторами, по ключу (created, id)."""
+    comments = Comment.objects.filter(post_id=post_id).select_related('author')
+    return CursorPaginator(
+        comments, settings.COUNT_PAGE_COMMENTS
+    ).get_page(after=after)
+
+
+def post_comments(request, post_id):
+    get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    comments = comment_page(post_id, request.GET.get('after'))
+    context = {
+        'post_id': post_id,
+        'comments': comments,
+        'comments_version': version(
+            f'comments:{post_id}',
+            *user_scopes(comment.author_id for comment in comments)
+        ),
+    }
+    return render(request, 'posts/comments.html', context)
+
+
+def post_search(request):
+    query = request.GET.get('q', '').strip()
+    page_obj = None
+    if query:
+        page_obj = search.search_page(
+            query,
+            settings.COUNT_PAGE_POSTS,
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+        )
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def add_comment(request, post_id):
     form = CommentForm(request.POST or None)
@@ -127,12 +190,17 @@ def add_comment(request, post_id):
 
 
 @login_required
+@conditional(follow_etag)
 def follow_index(request):
-    follow_lists = request.user.follower.values_list('author')
-    post_list = Post.objects.filter(author__in=follow_lists)
-    paginator = Paginator(post_list, settings.COUNT_PAGE_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = follow_feed(request.user).for_feed()
+    page_obj = paginate(
+        request,
+        post_list,
+        # Версия подписок сдвигается и новыми постами авторов, поэтому
+        # число постов пересчитывается после каждого из них.
+        count_scope=f'follow:{request.user.pk}:{get_follow_version(request)}'
+    )
+    remember_users(request, [post.author_id for post in page_obj])
     context = {
         'page_obj': page_obj,
     }
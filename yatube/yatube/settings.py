@@ -2,24 +2,140 @@ import os
 
 EMPTY_FIELD = '-пусто-'
 COUNT_PAGE_POSTS = 10
+# 'page' - номера страниц, 'cursor' - постраничный вывод по ключу.
+# Токены ?after=/?before= включают вывод по ключу в любом режиме.
+FEED_PAGINATION = 'page'
+# Число постов ленты хранится в кэше и обновляется сигналами постов.
+FEED_COUNT_TIMEOUT = 60 * 5
+PAGINATOR_ON_EACH_SIDE = 5
+# Админка не считает COUNT(*) по таблицам больше этого числа строк.
+ADMIN_EXACT_COUNT_LIMIT = 10000
+# Комментарии к посту выводятся по ключу (created, id) порциями.
+COUNT_PAGE_COMMENTS = 20
+# Ленты выводят начало поста: не больше стольких символов.
+POST_EXCERPT_LENGTH = 300
+# Наибольший размер страницы JSON API (?limit=).
+API_MAX_PAGE_SIZE = 100
+# Фрагменты лент сбрасываются сигналами, поэтому живут долго.
+FEED_CACHE_TIMEOUT = 60 * 60 * 6
+# Карточка поста общая для всех лент; ключ меняется при правке поста.
+CARD_CACHE_TIMEOUT = 60 * 60 * 24
+# Карточка с заглушкой, пока не готовы варианты картинки.
+CARD_PLACEHOLDER_TIMEOUT = 60
+# Ленты и посты отвечают 304 по ETag из поколений кэша. Ответы анонимам
+# общие кэши могут хранить столько секунд без перепроверки.
+ANONYMOUS_CACHE_MAX_AGE = 0
+# Целые страницы для анонимов без сессии хранятся по пути и ETag.
+# PAGE_CACHE_EDGE_MAX_AGE - s-maxage для обратного прокси, который не
+# узнает об изменениях и может столько секунд отдавать старую копию.
+PAGE_CACHE_TIMEOUT = 60 * 10
+PAGE_CACHE_EDGE_MAX_AGE = 0
+# Фрагмент пересчитывает один запрос, остальные отдают устаревшую копию
+# (она хранится еще SINGLE_FLIGHT_STALE_TIMEOUT секунд) или ждут
+# SINGLE_FLIGHT_WAIT секунд. BETA > 1 чаще обновляет фрагменты заранее.
+SINGLE_FLIGHT_LOCK_TIMEOUT = 10
+SINGLE_FLIGHT_STALE_TIMEOUT = 60 * 5
+SINGLE_FLIGHT_WAIT = 1
+SINGLE_FLIGHT_POLL_INTERVAL = 0.05
+SINGLE_FLIGHT_BETA = 1
+
+# Лента подписок раскладывается по подписчикам при публикации поста.
+# Посты авторов, у которых подписчиков больше FOLLOW_FEED_FANOUT_LIMIT,
+# не раскладываются и читаются на лету; так же читаются посты автора,
+# вернувшегося под предел, пока их не разложит rebuild_follow_feed
+# --pending. Подписка добавляет в ленту не больше
+# FOLLOW_FEED_BACKFILL_LIMIT последних постов автора.
+FOLLOW_FEED_MATERIALIZED = True
+FOLLOW_FEED_FANOUT_LIMIT = 1000
+FOLLOW_FEED_BACKFILL_LIMIT = 100
+FOLLOW_FEED_BATCH_SIZE = 500
+
+# Поиск по постам и комментариям. На SQLite - индекс FTS5 из миграций,
+# для других баз - posts.search.DatabaseBackend или свой SearchBackend.
+SEARCH_BACKEND = 'posts.search.SQLiteFTSBackend'
+SEARCH_MAX_TERMS = 8
+
+# Варианты картинок постов создает фоновый процесс thumbnail_worker;
+# шаблоны до их готовности выводят заглушку. Последний формат - запасной
+# для <img>, остальные выводятся в <source>. AVIF добавляется сюда, когда
+# его поддерживают Pillow и sorl-thumbnail.
+POST_IMAGE_WIDTHS = (320, 640, 960, 1920)
+POST_IMAGE_RATIO = (960, 339)
+POST_IMAGE_DEFAULT_WIDTH = 960
+POST_IMAGE_FORMATS = ('WEBP', 'JPEG')
+POST_IMAGE_SIZES = '(min-width: 992px) 720px, 100vw'
+# Потоки и пауза между проверками очереди команды thumbnail_worker;
+# при одном потоке очередь разбирается в потоке самой команды.
+THUMBNAIL_WORKERS = 2
+THUMBNAIL_POLL_INTERVAL = 1
+# После стольких неудачных попыток задача помечается неудачной, и
+# страницы выводят заглушку, не ставя картинку в очередь снова.
+THUMBNAIL_MAX_ATTEMPTS = 3
+# Страницы и API проверяют, что картинка без вариантов стоит в очереди,
+# не чаще раза в столько секунд.
+THUMBNAIL_REQUEUE_INTERVAL = 60
+# Через сколько секунд после удаления последнего поста thumbnail_worker
+# удаляет файл картинки; срок покрывает транзакции загрузок того же файла.
+POST_IMAGE_RELEASE_DELAY = 60 * 60
+# Загружаемые файлы больше FILE_UPLOAD_MAX_MEMORY_SIZE пишутся на диск
+# частями; файл больше POST_IMAGE_MAX_SIZE отбрасывается во время
+# загрузки. Формат и размер картинки проверяются по ее заголовку.
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+FILE_UPLOAD_HANDLERS = [
+    'posts.uploads.LimitedUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+POST_IMAGE_MAX_SIZE = 10 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 40 * 1000 * 1000
+POST_IMAGE_ALLOWED_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+
+# Размер порции команд export_data и import_data: строк в одном запросе
+# и в одной транзакции.
+TRANSFER_BATCH_SIZE = 1000
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 LOGOUT_REDIRECT_URL = ''
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
-}
-
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'), )
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
+# Локальный LRU каждого процесса перед общим для всех процессов кэшем.
+# Общий уровень - memcached из MEMCACHED_LOCATION, он нужен, когда сайт
+# работает на нескольких машинах. Без него - файловый кэш в yatube/cache:
+# его видят все воркеры сайта и thumbnail_worker на одной машине. Кэш в базе
+# TwoTierCache не принимает: его incr не атомарен.
+if os.environ.get('MEMCACHED_LOCATION'):
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': os.environ['MEMCACHED_LOCATION'],
+    }
+else:
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    }
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.TwoTierCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+            'LOCAL_TIMEOUT': 60,
+            'SYNC_INTERVAL': 1,
+        },
+    },
+    'shared': SHARED_CACHE,
+}
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
@@ -56,6 +172,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.AnonymousPageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -78,6 +195,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.cache.cache_timeout',
             ],
         },
     },